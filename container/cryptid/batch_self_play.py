@@ -0,0 +1,279 @@
+import numpy as np
+
+from cryptid.bitboard import mask_to_plane
+from cryptid.game_rules import (
+    HintTracker,
+    evaluate_hint_masks,
+    format_hintcode,
+    policy,
+    policy_cube,
+    select_top_cube_moves,
+    select_top_moves,
+)
+from cryptid.replay_memory import ReplayMemory
+from cryptid.zobrist import board_key, piece_keys, state_code
+
+PLAYERS = list(HintTracker.players)
+
+
+class BatchedGames:
+    """
+    The pieces of B games on same-sized boards, stored as arrays so rules apply to all at once.
+
+    For game b, player p and cell c:
+    - fits[b, p, c] tells whether the hint of p applies to c, which answers every question;
+    - cubes[b, p, c] and discs[b, p, c] hold the pieces;
+    - alive[b, p] is the HintTracker slot mask of p, and cell_slots[b, c] the slots a cube on
+      c removes. The hint catalog has fewer than 64 (hint, flag) slots, so both fit uint64;
+    - hashes[b] is the Zobrist hash of the pieces, see cryptid.zobrist.
+    """
+
+    def __init__(self, puzzles):
+        """
+        Args:
+        puzzles (list): Puzzle objects, all with the same number of rows and columns.
+        """
+        if len({(puzzle.rows, puzzle.cols) for puzzle in puzzles}) != 1:
+            raise ValueError("All puzzles of a batch must have the same board size")
+        self.puzzles = puzzles
+        self.cells = puzzles[0].board.cells
+        self.index = puzzles[0].board.index
+        self.hints_players = [puzzle.hints_players for puzzle in puzzles]
+        n_games, n_cells = len(puzzles), len(self.cells)
+
+        trackers = [HintTracker.from_board(puzzle.board) for puzzle in puzzles]
+        self.hint_slots = np.array(trackers[0].hint_slots, dtype=np.uint64)
+        self.cell_slots = np.array([t.cell_slots for t in trackers], dtype=np.uint64)
+        self.fits = np.array(
+            [
+                [
+                    mask_to_plane(mask, n_cells)
+                    for mask in evaluate_hint_masks(p.board, p.hints)
+                ]
+                for p in puzzles
+            ]
+        )
+        all_slots = np.bitwise_or.reduce(self.hint_slots)
+        self.alive = np.full((n_games, 3), all_slots, dtype=np.uint64)
+        self.cubes = np.zeros((n_games, 3, n_cells), dtype=bool)
+        self.discs = np.zeros((n_games, 3, n_cells), dtype=bool)
+        self.keys = piece_keys(n_cells)
+        self.hashes = np.zeros(n_games, dtype=np.uint64)
+        self.board_keys = [board_key(puzzle.board) for puzzle in puzzles]
+
+        self.active = np.ones(n_games, dtype=bool)
+        self.won = np.zeros(n_games, dtype=bool)
+        self.last_player = np.zeros(n_games, dtype=int)
+
+    def __len__(self):
+        return len(self.puzzles)
+
+    def placements(self, p):
+        """
+        Return the cells where player p can place a cube and a disc, as in
+        find_available_placements: empty cells, split by whether the hint of p applies.
+
+        Returns:
+        tuple: Boolean arrays (cube, disc) of shape (B, cells).
+        """
+        empty = ~(self.cubes.any(axis=1) | self.discs.any(axis=1))
+        return empty & ~self.fits[:, p], empty & self.fits[:, p]
+
+    def place(self, games, players, cells, is_disc):
+        """
+        Place one piece in each of several games.
+
+        Args:
+        games, players, cells (numpy.ndarray): Game, player and cell index of every piece.
+        is_disc (numpy.ndarray or bool): Whether each piece is a disc.
+        """
+        is_disc = np.broadcast_to(is_disc, np.shape(games))
+        placed = np.where(
+            is_disc,
+            self.discs[games, players, cells],
+            self.cubes[games, players, cells],
+        )
+        keys = self.keys[cells, players, is_disc.astype(int)]
+        # Games appear once per call, so the fancy-indexed XOR does not lose updates
+        self.hashes[games] ^= np.where(placed, np.uint64(0), keys)
+        self.discs[games, players, cells] |= is_disc
+        self.cubes[games, players, cells] |= ~is_disc
+        removed = np.where(is_disc, np.uint64(0), self.cell_slots[games, cells])
+        self.alive[games, players] &= ~removed
+
+    def counts(self, alive):
+        """Return the number of possible hints for slot masks of any shape."""
+        return ((alive[..., None] & self.hint_slots) != 0).sum(axis=-1)
+
+    def predicted_states(self, b, p, cube_cells):
+        """
+        List the moves of player p in game b with their resulting state codes.
+
+        Gives the same result as find_available_moves followed by evaluate_move_states on the
+        equivalent game map: every question or wild guess, followed by {state code: number
+        of states of generate_states leading to it}.
+
+        Args:
+        b (int): The game.
+        p (int): The player to move.
+        cube_cells (numpy.ndarray): Boolean array of the cells where p can place a cube.
+
+        Returns:
+        list: The moves with their states.
+        """
+        base = self.counts(self.alive[b])
+        after_cube = self.counts(self.alive[b][:, None] & ~self.cell_slots[b])
+        # A cube of p only changes the count of p, so the possible counts of p after its
+        # follow-up cube, with their multiplicity, are the same for every move
+        own_counts, own_weights = np.unique(
+            after_cube[p][cube_cells], return_counts=True
+        )
+        player = PLAYERS[p]
+
+        def cube_states(q, cell):
+            counts = base.copy()
+            counts[q] = after_cube[q, cell]
+            for own_count, weight in zip(own_counts.tolist(), own_weights.tolist()):
+                counts[p] = own_count
+                yield format_hintcode(player, counts.tolist()), weight
+
+        def add(states, code, weight):
+            states[code] = states.get(code, 0) + weight
+
+        movable = ~self.cubes[b].any(axis=0) & ~self.discs[b, p]
+        others = [q for q in range(3) if q != p]
+        n1, n2 = (p + 1) % 3, (p + 2) % 3
+        moves = []
+        for cell in np.flatnonzero(movable).tolist():
+            node = self.cells[cell]
+            for q in others:
+                states = {format_hintcode(PLAYERS[q], base.tolist()): 1}
+                for code, weight in cube_states(q, cell):
+                    add(states, code, weight)
+                moves.append(("question", node, PLAYERS[q], states))
+            if self.fits[b, p, cell]:
+                states = {}
+                for code, weight in cube_states(n1, cell):
+                    add(states, code, weight)
+                add(states, format_hintcode(PLAYERS[n2], base.tolist()), 1)
+                for code, weight in cube_states(n2, cell):
+                    add(states, code, weight)
+                moves.append(("wild_guess", node, states))
+        return moves
+
+    def state_key(self, b):
+        """Return the state code of game b, as process_move_mapcode on a game map."""
+        return state_code(self.board_keys[b], int(self.hashes[b]))
+
+    def finish(self, games, won=False):
+        self.active[games] = False
+        self.won[games] = won
+
+
+def play_batch(generator, puzzles, q_matrix, rounds=20, replay_memory=None):
+    """
+    Play one self-play game per puzzle, all games advancing in lockstep.
+
+    Legal moves, answers, placements and the predicted states of every move are computed
+    with array operations over all games. Only the policy choice runs per game, with the same
+    Q-matrix policy as play_game. A game ends as soon as its player to move has no legal
+    move, or a wild guess is confirmed by both other players.
+
+    Args:
+    generator (numpy.random.Generator): The random generator.
+    puzzles (list): The Puzzle of every game, all with the same board size.
+    q_matrix (dict-like): The Q-matrix the moves are chosen with, it is only read.
+    rounds (int): Maximum number of rounds.
+    replay_memory (ReplayMemory or None): Memory the transitions are recorded in, shared
+    across batches; None for a memory of this batch only.
+
+    Returns:
+    list: Per game, (replay buffer, final state, winner or None), ready for learn_from_game.
+    """
+    games = BatchedGames(puzzles)
+    if replay_memory is None:
+        replay_memory = ReplayMemory(capacity=len(PLAYERS) * rounds * len(puzzles))
+    game_ids = [replay_memory.new_game() for _ in puzzles]
+
+    def place_cubes(candidates, p):
+        """Let player p choose and place a cube in every candidate game that has a free cell."""
+        cube_cells = games.placements(p)[0]
+        candidates = candidates[cube_cells[candidates].any(axis=1)]
+        cells = []
+        for b in candidates.tolist():
+            cube_moves = [
+                ("cube", games.cells[cell])
+                for cell in np.flatnonzero(cube_cells[b]).tolist()
+            ]
+            hint = games.hints_players[b][PLAYERS[p]]
+            top_cube_moves = select_top_cube_moves(
+                generator, q_matrix, cube_moves, hint
+            )
+            cells.append(games.index[policy_cube(generator, top_cube_moves)[1]])
+        games.place(candidates, p, np.array(cells, dtype=int), False)
+        return candidates
+
+    all_games = np.arange(len(puzzles))
+    # Initial cube placement for each player
+    for _ in range(2):
+        for p in range(3):
+            place_cubes(all_games, p)
+
+    for _ in range(rounds):
+        for p in range(3):
+            active = np.flatnonzero(games.active)
+            if not len(active):
+                break
+            cube_cells, disc_cells = games.placements(p)
+            stuck = ~(cube_cells[active].any(axis=1) | disc_cells[active].any(axis=1))
+            games.last_player[active] = p
+            games.finish(active[stuck])
+            movers = active[~stuck]
+
+            # Policy choice, per game
+            is_question = np.zeros(len(movers), dtype=bool)
+            cells = np.zeros(len(movers), dtype=int)
+            targets = np.zeros(len(movers), dtype=int)
+            for k, b in enumerate(movers.tolist()):
+                hint = games.hints_players[b][PLAYERS[p]]
+                moves = games.predicted_states(b, p, cube_cells[b])
+                selected_move = policy(
+                    generator, select_top_moves(generator, q_matrix, moves, hint)
+                )
+                replay_memory.add(
+                    games.state_key(b), selected_move[:2], hint, game_ids[b]
+                )
+                is_question[k] = selected_move[0] == "question"
+                cells[k] = games.index[selected_move[1]]
+                if is_question[k]:
+                    targets[k] = PLAYERS.index(selected_move[2])
+
+            # Questions: the questioned player answers with a disc or a cube
+            asked = movers[is_question]
+            asked_cells, asked_players = cells[is_question], targets[is_question]
+            answers = games.fits[asked, asked_players, asked_cells]
+            games.place(asked, asked_players, asked_cells, answers)
+            cube_placed = [asked[~answers]]
+
+            # Wild guesses: the next players answer in turn until one places a cube
+            guessed = movers[~is_question]
+            guess_cells = cells[~is_question]
+            games.place(guessed, p, guess_cells, True)
+            for j in (1, 2):
+                q = (p + j) % 3
+                answers = games.fits[guessed, q, guess_cells]
+                games.place(guessed, q, guess_cells, answers)
+                cube_placed.append(guessed[~answers])
+                guessed, guess_cells = guessed[answers], guess_cells[answers]
+            games.finish(guessed, won=True)
+
+            # After a cube was placed, the player to move places a cube too
+            cube_placed = np.concatenate(cube_placed)
+            placed = place_cubes(cube_placed, p)
+            games.finish(np.setdiff1d(cube_placed, placed))
+
+    results = []
+    for b in range(len(puzzles)):
+        winner = PLAYERS[games.last_player[b]] if games.won[b] else None
+        results.append((replay_memory.episode(game_ids[b]), games.state_key(b), winner))
+    return results
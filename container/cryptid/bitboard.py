@@ -0,0 +1,191 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+
+
+def popcount(mask: int) -> int:
+    """
+    Count the number of cells set in a mask.
+
+    Parameters:
+    - mask: A bitmask over cells.
+
+    Returns:
+    - The number of set bits.
+    """
+    return mask.bit_count()
+
+
+def mask_to_plane(mask: int, n_cells: int) -> np.ndarray:
+    """
+    Convert a bitmask over cells to a NumPy boolean plane.
+
+    Parameters:
+    - mask: A bitmask over cells, bit i corresponding to cell i.
+    - n_cells: The number of cells on the board.
+
+    Returns:
+    - A boolean array of length n_cells.
+    """
+    n_bytes = (n_cells + 7) // 8
+    raw = np.frombuffer(mask.to_bytes(n_bytes, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:n_cells].astype(bool)
+
+
+def plane_to_mask(plane: np.ndarray) -> int:
+    """
+    Convert a NumPy boolean plane over cells to a bitmask.
+
+    Parameters:
+    - plane: A boolean array of length n_cells.
+
+    Returns:
+    - A bitmask with bit i set when plane[i] is True.
+    """
+    packed = np.packbits(np.asarray(plane, dtype=bool), bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+class BitBoard:
+    """
+    Compact board representation storing each boolean node attribute as a bitmask over cells.
+
+    Cell i of the board is bit i of every mask. An 88-cell board therefore needs two machine
+    words per attribute instead of one dict entry per node. Use `to_graph` to get a networkx
+    view for callers that still work on graphs.
+    """
+
+    def __init__(
+        self,
+        cells: Sequence[Any],
+        masks: Optional[Dict[str, int]] = None,
+        edges: Optional[Iterable[Tuple[Any, Any]]] = None,
+    ):
+        self.cells = list(cells)
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+        self.masks = dict(masks or {})
+        self.edges = list(edges or [])
+        self.full_mask = (1 << len(self.cells)) - 1
+
+    @classmethod
+    def from_graph(cls, G: nx.Graph) -> "BitBoard":
+        """
+        Build a bitboard from a networkx graph with boolean node attributes.
+
+        Parameters:
+        - G: A networkx graph (nx.Graph) with boolean attributes on nodes.
+
+        Returns:
+        - A BitBoard with one mask per boolean attribute found on any node.
+        """
+        masks: Dict[str, int] = {}
+        for i, (node, attrs) in enumerate(G.nodes(data=True)):
+            bit = 1 << i
+            for attr, value in attrs.items():
+                if not isinstance(value, bool):
+                    continue
+                if value:
+                    masks[attr] = masks.get(attr, 0) | bit
+                else:
+                    masks.setdefault(attr, 0)
+        return cls(G.nodes, masks, G.edges())
+
+    @classmethod
+    def from_planes(
+        cls,
+        cells: Sequence[Any],
+        attributes: Sequence[str],
+        planes: np.ndarray,
+        edges: Optional[Iterable[Tuple[Any, Any]]] = None,
+    ) -> "BitBoard":
+        """
+        Build a bitboard from stacked boolean planes.
+
+        Parameters:
+        - cells: The cell identifiers, in bit order.
+        - attributes: The attribute name of every plane.
+        - planes: A boolean array of shape (len(attributes), len(cells)).
+        - edges: Optional edge list used by the networkx view.
+
+        Returns:
+        - A BitBoard holding one mask per plane.
+        """
+        masks = {attr: plane_to_mask(plane) for attr, plane in zip(attributes, planes)}
+        return cls(cells, masks, edges)
+
+    @property
+    def attributes(self) -> List[str]:
+        return list(self.masks)
+
+    def mask(self, attr: str) -> int:
+        """Return the mask of an attribute, treating unknown attributes as all False."""
+        return self.masks.get(attr, 0)
+
+    def any_mask(self, attributes: Iterable[str]) -> int:
+        """Return the union of the masks of several attributes."""
+        result = 0
+        for attr in attributes:
+            result |= self.masks.get(attr, 0)
+        return result
+
+    def has(self, cell: Any, attr: str) -> bool:
+        """Check whether an attribute is set on a cell."""
+        return bool((self.masks.get(attr, 0) >> self.index[cell]) & 1)
+
+    def set(self, cell: Any, attr: str, value: bool = True) -> None:
+        """Set or clear an attribute on a cell."""
+        bit = 1 << self.index[cell]
+        if value:
+            self.masks[attr] = self.masks.get(attr, 0) | bit
+        else:
+            self.masks[attr] = self.masks.get(attr, 0) & ~bit
+
+    def cells_in(self, mask: int) -> List[Any]:
+        """Return the cells whose bit is set in a mask, in board order."""
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(self.cells[low.bit_length() - 1])
+            mask ^= low
+        return cells
+
+    def node_attributes(self, cell: Any) -> Dict[str, bool]:
+        """Return the attribute dict of a single cell, as stored on a networkx node."""
+        i = self.index[cell]
+        return {attr: bool((mask >> i) & 1) for attr, mask in self.masks.items()}
+
+    def planes(self, attributes: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Stack attribute masks into a boolean array.
+
+        Parameters:
+        - attributes: The attributes to stack (default is all attributes).
+
+        Returns:
+        - A boolean array of shape (len(attributes), len(cells)).
+        """
+        attributes = self.attributes if attributes is None else attributes
+        n_cells = len(self.cells)
+        planes = np.zeros((len(attributes), n_cells), dtype=bool)
+        for k, attr in enumerate(attributes):
+            planes[k] = mask_to_plane(self.masks.get(attr, 0), n_cells)
+        return planes
+
+    def to_graph(self) -> nx.Graph:
+        """
+        Build a networkx view of the board.
+
+        Returns:
+        - A networkx graph (nx.Graph) with the same nodes, edges and boolean attributes.
+        """
+        G = nx.Graph()
+        G.add_nodes_from((cell, self.node_attributes(cell)) for cell in self.cells)
+        G.add_edges_from(self.edges)
+        return G
+
+    def copy(self) -> "BitBoard":
+        return BitBoard(self.cells, self.masks, self.edges)
+
+    def __len__(self) -> int:
+        return len(self.cells)
@@ -1,9 +1,16 @@
 import networkx as nx
 import numpy as np
 
-from utils.graph_generate_landscape import generate_hexagonal_grid_graph
-from utils.graph_generate_random_area import add_connected_area_attribute
-from utils.graph_utils import enrich_node_attributes
+from cryptid.bitboard import BitBoard
+from utils.graph_generate_landscape import (
+    generate_hexagonal_grid_graph,
+    get_hex_topology,
+)
+from utils.graph_generate_random_area import (
+    add_connected_area_attribute,
+    generate_connected_area_planes,
+)
+from utils.graph_utils import enrich_node_attributes, neighbor_planes
 
 
 def generate_structure_color_combinations():
@@ -115,12 +122,12 @@ def get_terrain_types():
 
 
 def generate_game_map(generator, rows, cols):
-    G = generate_hexagonal_grid_graph(rows, cols)
+    G = generate_hexagonal_grid_graph(generator, rows, cols)
 
     # Add animal areas
     for animal in get_all_animals():
-        add_connected_area_attribute(G, f"is_{animal.lower()}", 2)
-        add_connected_area_attribute(G, f"is_{animal.lower()}", 3)
+        add_connected_area_attribute(generator, G, f"is_{animal.lower()}", 2)
+        add_connected_area_attribute(generator, G, f"is_{animal.lower()}", 3)
 
     # Add random structures to the board
     add_random_structures(generator, G, rows, cols)
@@ -131,6 +138,154 @@ def generate_game_map(generator, rows, cols):
     all_attrs = [f"is_{animal}" for animal in get_all_animals()] + all_structures
 
     # Enrich node attributes for all structures
-    G = enrich_node_attributes(G)
+    G = enrich_node_attributes(G, adjacency=get_hex_topology(rows, cols).adjacency)
 
     return G
+
+
+def generate_game_board(generator, rows, cols):
+    """
+    Generate a game map as a compact bitboard.
+
+    Args:
+    generator (numpy.random.Generator): The random number generator.
+    rows (int): Number of rows in the grid.
+    cols (int): Number of columns in the grid.
+
+    Returns:
+    BitBoard: The enriched game map with one mask per attribute.
+    """
+    return BitBoard.from_graph(generate_game_map(generator, rows, cols))
+
+
+def get_base_attributes():
+    """
+    List the attributes drawn during board generation, before enrichment.
+
+    Returns:
+    list: Terrain, animal territory, structure-color, structure type and color attributes.
+    """
+    structures, colors = generate_all_structures()
+    return (
+        [f"is_{terrain}" for terrain in get_terrain_types()]
+        + [f"is_{animal}" for animal in get_all_animals()]
+        + generate_structure_color_combinations()
+        + structures
+        + colors
+    )
+
+
+def get_board_attributes(levels=3):
+    """
+    List the attributes of an enriched board, in the plane order of generate_game_maps.
+
+    Args:
+    levels (int): The number of neighbor levels added by enrichment.
+
+    Returns:
+    list: The base attributes followed by their neighbor_ prefixed versions, level by level.
+    """
+    base = get_base_attributes()
+    return base + [
+        f"{'_'.join(['neighbor'] * level)}_{attr}"
+        for level in range(1, levels + 1)
+        for attr in base
+    ]
+
+
+def add_random_structure_planes(
+    generator, planes, attributes, min_structures=4, max_structures=6
+):
+    """
+    Place random structures on a batch of boards stored as planes.
+
+    Every board gets between min_structures and max_structures distinct structures, each on
+    a different cell, matching add_random_structures.
+
+    Args:
+    generator (numpy.random.Generator): The random number generator.
+    planes (numpy.ndarray): Boolean array of shape (n, len(attributes), cells), updated in place.
+    attributes (list): The attribute name of every plane.
+    min_structures (int): Minimum number of structures per board.
+    max_structures (int): Maximum number of structures per board.
+    """
+    n, _, n_cells = planes.shape
+    index = {attr: k for k, attr in enumerate(attributes)}
+    all_structures = generate_structure_color_combinations()
+    structure_planes = np.array([index[s] for s in all_structures])
+    type_planes = np.array([index[s.rsplit("_", 1)[0]] for s in all_structures])
+    color_planes = np.array([index[s.rsplit("_", 1)[1]] for s in all_structures])
+
+    counts = generator.integers(min_structures, max_structures + 1, size=n)
+    # Sorting random keys gives an independent permutation per board
+    chosen = np.argsort(generator.random((n, len(all_structures))), axis=1)
+    locations = np.argsort(generator.random((n, n_cells)), axis=1)
+
+    boards, slots = np.nonzero(np.arange(max_structures)[None, :] < counts[:, None])
+    structures = chosen[boards, slots]
+    cells = locations[boards, slots]
+    planes[boards, structure_planes[structures], cells] = True
+    planes[boards, type_planes[structures], cells] = True
+    planes[boards, color_planes[structures], cells] = True
+
+
+def generate_game_maps(generator, n, rows, cols):
+    """
+    Generate n game maps at once as stacked boolean planes.
+
+    Terrain assignment, animal territory growth, structure placement and enrichment all run
+    vectorized over the batch.
+
+    Args:
+    generator (numpy.random.Generator): The random number generator.
+    n (int): Number of boards to generate.
+    rows (int): Number of rows in the grid.
+    cols (int): Number of columns in the grid.
+
+    Returns:
+    tuple: The attribute names (see get_board_attributes) and a boolean array of shape
+    (n, len(attributes), rows * cols). Cells are ordered as get_hex_topology(rows, cols).nodes.
+    """
+    topology = get_hex_topology(rows, cols)
+    n_cells = len(topology.nodes)
+    base = get_base_attributes()
+    index = {attr: k for k, attr in enumerate(base)}
+    planes = np.zeros((n, len(base), n_cells), dtype=bool)
+
+    # One terrain per cell
+    terrains = get_terrain_types()
+    terrain = generator.integers(0, len(terrains), size=(n, n_cells))
+    planes[:, : len(terrains)] = (
+        terrain[:, None, :] == np.arange(len(terrains))[:, None]
+    )
+
+    # Add animal areas
+    for animal in get_all_animals():
+        for size in (2, 3):
+            planes[:, index[f"is_{animal}"]] |= generate_connected_area_planes(
+                generator, topology.adjacency, n, size
+            )
+
+    # Add random structures to the boards
+    add_random_structure_planes(generator, planes, base)
+
+    # Enrich all boards and attributes at once
+    levels = neighbor_planes(topology.adjacency, planes, levels=3)
+    return get_board_attributes(3), np.concatenate([planes] + levels, axis=1)
+
+
+def unstack_game_map(attributes, planes, rows, cols):
+    """
+    Turn one board of a generate_game_maps batch into a bitboard.
+
+    Args:
+    attributes (list): The attribute name of every plane.
+    planes (numpy.ndarray): Boolean array of shape (len(attributes), rows * cols).
+    rows (int): Number of rows in the grid.
+    cols (int): Number of columns in the grid.
+
+    Returns:
+    BitBoard: The board, whose to_graph() gives the networkx view.
+    """
+    topology = get_hex_topology(rows, cols)
+    return BitBoard.from_planes(topology.nodes, attributes, planes, topology.edges)
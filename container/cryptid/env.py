@@ -0,0 +1,203 @@
+import numpy as np
+
+from cryptid.game_rules import HintTracker, evaluate_hint_masks
+from cryptid.game_state import GameState
+from cryptid.zobrist import board_key, piece_keys, state_code
+
+PLAYERS = list(HintTracker.players)
+PIECES = list(GameState.pieces)
+
+
+class CryptidEnv:
+    """
+    Gym-style environment running one game of Cryptid on a GameState.
+
+    Players take turns as in play_game: two rounds of initial cubes, then up to `rounds`
+    rounds of questions and wild guesses, a player placing a cube of their own after
+    any other player placed one. Actions are the move tuples of the game rules:
+    ("cube", node), ("question", node, player) and ("wild_guess", node).
+
+    Observations are dicts of arrays, kept up to date piece by piece:
+    - pieces: bool array (2, 3, cells), [piece type (cube, disc), player, cell];
+    - possible_hints: the number of catalog hints each player's cubes still allow;
+    - player: index of the player to act;
+    - phase: "cube" when the player must place a cube, "move" for a question or guess.
+    """
+
+    def __init__(self, rounds=20):
+        self.rounds = rounds
+        self.puzzle = None
+
+    def reset(self, puzzle):
+        """
+        Start a game.
+
+        Args:
+        puzzle (Puzzle): The puzzle to play.
+
+        Returns:
+        dict: The first observation.
+        """
+        board = puzzle.board
+        self.puzzle = puzzle
+        self.cells = board.cells
+        self.index = board.index
+        self.hints_players = puzzle.hints_players
+        self.fits = evaluate_hint_masks(board, puzzle.hints)
+        self.state = GameState(self.cells, HintTracker.from_board(board))
+        self.pieces = np.zeros((len(PIECES), len(PLAYERS), len(self.cells)), dtype=bool)
+        # Zobrist hash of the pieces, see cryptid.zobrist
+        self.keys = piece_keys(len(self.cells)).tolist()
+        self.board_key = board_key(board)
+        self.hash = 0
+
+        self.player = 0
+        self.phase = "cube"
+        self.setup_turns = 2 * len(PLAYERS)
+        self.round = 0
+        self.done = False
+        self.winner = None
+        self.skip_setup_turns()
+        return self.observation()
+
+    def observation(self):
+        return {
+            "pieces": self.pieces.copy(),
+            "possible_hints": np.array(self.state.counts()),
+            "player": self.player,
+            "phase": self.phase,
+        }
+
+    def state_key(self):
+        """Return the state code of the position, as process_move_mapcode on a game map."""
+        return state_code(self.board_key, self.hash)
+
+    def placements(self, p):
+        """Return the masks of the cells where player p can place a cube and a disc."""
+        empty = ~self.state.mask() & ((1 << len(self.cells)) - 1)
+        return empty & ~self.fits[p], empty & self.fits[p]
+
+    def cells_in(self, mask):
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(self.cells[low.bit_length() - 1])
+            mask ^= low
+        return cells
+
+    def legal_actions(self):
+        """
+        Return the actions of the player to act, in the order of the game rules.
+
+        Returns:
+        list: Cube placements in the cube phase, else the moves of find_available_moves.
+        """
+        if self.done:
+            return []
+        if self.phase == "cube":
+            return [
+                ("cube", node)
+                for node in self.cells_in(self.placements(self.player)[0])
+            ]
+
+        player = PLAYERS[self.player]
+        blocked = self.state.mask("cube") | self.state.mask("disc", player)
+        fits = self.fits[self.player]
+        actions = []
+        for i, node in enumerate(self.cells):
+            if (blocked >> i) & 1:
+                continue
+            for other in PLAYERS:
+                if other != player:
+                    actions.append(("question", node, other))
+            if (fits >> i) & 1:
+                actions.append(("wild_guess", node))
+        return actions
+
+    def place(self, p, node, is_disc):
+        self.state.place(PLAYERS[p], node, is_disc)
+        cell = self.index[node]
+        if not self.pieces[int(is_disc), p, cell]:
+            self.pieces[int(is_disc), p, cell] = True
+            self.hash ^= self.keys[cell][p][int(is_disc)]
+
+    def answers(self, p, node):
+        """Check whether the hint of player p applies to node."""
+        return bool((self.fits[p] >> self.index[node]) & 1)
+
+    def step(self, action):
+        """
+        Play an action of the player to act.
+
+        Args:
+        action (tuple): One of legal_actions().
+
+        Returns:
+        tuple: (observation, reward, done, info). The reward is 1 for the action winning the
+        game, else 0. info holds the winner, set once the game is won.
+        """
+        if action not in self.legal_actions():
+            raise ValueError(f"Illegal action {action!r} for {PLAYERS[self.player]}")
+        p = self.player
+        reward = 0.0
+        if action[0] == "cube":
+            self.place(p, action[1], False)
+            if self.setup_turns:
+                self.setup_turns -= 1
+                self.next_player()
+                self.skip_setup_turns()
+            else:
+                self.end_turn()
+        else:
+            node = action[1]
+            cube_placed = False
+            if action[0] == "question":
+                q = PLAYERS.index(action[2])
+                answer = self.answers(q, node)
+                self.place(q, node, answer)
+                cube_placed = not answer
+            else:
+                self.place(p, node, True)
+                for j in (1, 2):
+                    q = (p + j) % len(PLAYERS)
+                    answer = self.answers(q, node)
+                    self.place(q, node, answer)
+                    if not answer:
+                        cube_placed = True
+                        break
+                else:
+                    self.done = True
+                    self.winner = PLAYERS[p]
+                    reward = 1.0
+
+            if cube_placed:
+                # The player to act places a cube of their own, if they can
+                self.phase = "cube"
+                if not self.placements(p)[0]:
+                    self.done = True
+            elif not self.done:
+                self.end_turn()
+        return self.observation(), reward, self.done, {"winner": self.winner}
+
+    def next_player(self):
+        self.player = (self.player + 1) % len(PLAYERS)
+
+    def skip_setup_turns(self):
+        """Skip initial cube turns of players without a cube placement."""
+        while self.setup_turns and not self.placements(self.player)[0]:
+            self.setup_turns -= 1
+            self.next_player()
+        if not self.setup_turns:
+            self.start_turn()
+
+    def end_turn(self):
+        self.next_player()
+        if self.player == 0:
+            self.round += 1
+        self.start_turn()
+
+    def start_turn(self):
+        self.phase = "move"
+        cube, disc = self.placements(self.player)
+        if self.round >= self.rounds or not (cube or disc):
+            self.done = True
@@ -0,0 +1,212 @@
+import multiprocessing as mp
+
+import numpy as np
+
+from cryptid.game_rules import HintTracker, attached, evaluate_move_states
+from cryptid.game_state import GameState
+from cryptid.state_cache import StateCache
+
+# Per-worker state, set up by init_worker
+worker_state = {}
+
+
+def init_worker(shared, hint_slots, cell_slots, cells, cache_size):
+    worker_state["shared"] = shared
+    worker_state["template"] = (
+        hint_slots,
+        cell_slots,
+        {c: i for i, c in enumerate(cells)},
+    )
+    worker_state["cells"] = cells
+    worker_state["version"] = None
+    worker_state["cubes"] = None
+    worker_state["tracker"] = None
+    # Lives as long as the pool, so repeated states are shared across moves and turns
+    worker_state["cache"] = StateCache(cache_size)
+
+
+def read_cube_masks(shared, n_players, n_bytes):
+    """Read the version counter and the cube mask of every player from shared memory."""
+    buffer = np.frombuffer(shared, dtype=np.uint8)
+    version = int(buffer[:8].view(np.uint64)[0])
+    masks = [
+        int.from_bytes(
+            buffer[8 + p * n_bytes : 8 + (p + 1) * n_bytes].tobytes(), "little"
+        )
+        for p in range(n_players)
+    ]
+    return version, masks
+
+
+def sync_worker():
+    """Bring the worker's tracker up to date, applying only the cubes added since last sync."""
+    cells = worker_state["cells"]
+    n_bytes = (len(cells) + 7) // 8
+    players = HintTracker.players
+    version, masks = read_cube_masks(worker_state["shared"], len(players), n_bytes)
+    if version == worker_state["version"]:
+        return worker_state["tracker"]
+
+    tracker, old_masks = worker_state["tracker"], worker_state["cubes"]
+    if tracker is None or any(old & ~new for old, new in zip(old_masks, masks)):
+        # Cubes were removed (e.g. a new game): start from an empty board
+        tracker = HintTracker(*worker_state["template"])
+        old_masks = [0] * len(players)
+    for player, old, new in zip(players, old_masks, masks):
+        added = new & ~old
+        while added:
+            low = added & -added
+            tracker.add_cube(player, cells[low.bit_length() - 1])
+            added ^= low
+
+    worker_state.update(version=version, cubes=masks, tracker=tracker)
+    return tracker
+
+
+def evaluate_chunk(args):
+    moves, player, my_placements = args
+    tracker = sync_worker()
+    cubes = dict(zip((f"cube_{p}" for p in HintTracker.players), worker_state["cubes"]))
+    state = GameState(worker_state["cells"], tracker, cubes)
+    cache = worker_state["cache"]
+    hits, misses = cache.hits, cache.misses
+    cube_classes = tracker.group_cells(player, my_placements["cube"])
+    results = [
+        evaluate_move_states(state, move, player, my_placements, cache, cube_classes)
+        for move in moves
+    ]
+    return results, cache.hits - hits, cache.misses - misses
+
+
+class LocalEvaluator:
+    """
+    Evaluates moves in the calling process, with the same interface as EvaluationPool.
+
+    Meant for processes that cannot start a pool of their own, e.g. the workers of a
+    multi-game training run, which already use every core.
+    """
+
+    def __init__(self, game_map, cache_size=100_000):
+        self.cache = StateCache(cache_size)
+        self.state = None
+        self.update(game_map)
+
+    @property
+    def cache_hits(self):
+        return self.cache.hits
+
+    @property
+    def cache_misses(self):
+        return self.cache.misses
+
+    def update(self, game_map):
+        """Take over the pieces currently on the game map."""
+        tracker = attached(game_map, "hint_tracker") or HintTracker.from_graph(game_map)
+        self.state = GameState.from_graph(game_map, tracker.copy())
+
+    def evaluate(self, moves, player, my_placements):
+        """Evaluate moves against the last update, see EvaluationPool.evaluate."""
+        cube_classes = self.state.tracker.group_cells(player, my_placements["cube"])
+        return [
+            evaluate_move_states(
+                self.state, move, player, my_placements, self.cache, cube_classes
+            )
+            for move in moves
+        ]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EvaluationPool:
+    """
+    Long-lived process pool for find_predicted_states.
+
+    Workers receive the static part of the board (the hint tracker tables) once, when the
+    pool starts. Between turns only the cube masks are written to shared memory, and each
+    worker applies the cubes added since its last sync. Moves are sent in chunks, so a turn
+    costs a handful of small messages instead of one pickled game map per move.
+
+    Every worker keeps a StateCache of hint counts for the lifetime of the pool. The hits
+    and misses over all workers are summed in cache_hits and cache_misses.
+    """
+
+    def __init__(self, game_map, processes=None, chunksize=16, cache_size=100_000):
+        """
+        Start the pool for a game map.
+
+        Args:
+        game_map (networkx.Graph): The game map, with pieces initialized.
+        processes (int or None): Pool size, None for one process per CPU.
+        chunksize (int): Number of moves per task.
+        cache_size (int): Maximum number of cached states per worker, 0 disables caching.
+        """
+        tracker = attached(game_map, "hint_tracker") or HintTracker.from_graph(game_map)
+        self.cells = list(game_map.nodes)
+        self.n_bytes = (len(self.cells) + 7) // 8
+        self.chunksize = chunksize
+        self.version = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.shared = mp.RawArray("B", 8 + len(HintTracker.players) * self.n_bytes)
+        self.pool = mp.Pool(
+            processes,
+            initializer=init_worker,
+            initargs=(
+                self.shared,
+                tracker.hint_slots,
+                tracker.cell_slots,
+                self.cells,
+                cache_size,
+            ),
+        )
+
+    def update(self, game_map):
+        """Publish the cubes currently on the game map to the workers."""
+        buffer = np.frombuffer(self.shared, dtype=np.uint8)
+        for p, player in enumerate(HintTracker.players):
+            mask = 0
+            for i, node in enumerate(self.cells):
+                if game_map.nodes[node].get(f"cube_{player}", False):
+                    mask |= 1 << i
+            start = 8 + p * self.n_bytes
+            buffer[start : start + self.n_bytes] = np.frombuffer(
+                mask.to_bytes(self.n_bytes, "little"), dtype=np.uint8
+            )
+        # Bump the version last, so workers see a complete update
+        self.version += 1
+        buffer[:8].view(np.uint64)[0] = self.version
+
+    def evaluate(self, moves, player, my_placements):
+        """
+        Evaluate moves against the last published board.
+
+        Returns:
+        list: Every move followed by its resulting state codes, in move order.
+        """
+        chunks = [
+            (moves[i : i + self.chunksize], player, my_placements)
+            for i in range(0, len(moves), self.chunksize)
+        ]
+        results = []
+        for chunk_results, hits, misses in self.pool.map(evaluate_chunk, chunks):
+            results.extend(chunk_results)
+            self.cache_hits += hits
+            self.cache_misses += misses
+        return results
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,91 @@
+import multiprocessing as mp
+
+import numpy as np
+
+from cryptid.board import generate_game_maps, get_base_attributes, unstack_game_map
+from cryptid.game_rules import find_unique_hint_triples, hint_id
+from cryptid.puzzle_store import PuzzleStore, pack_puzzle
+from utils.graph_generate_landscape import get_hex_topology
+
+
+def farm_shard(args):
+    """
+    Generate the puzzles of one shard.
+
+    Args:
+    args (tuple): (seed_sequence, n_boards, rows, cols, puzzles_per_board). The shard draws
+    only from its own seed sequence, so its output is reproducible.
+
+    Returns:
+    list: Packed puzzle records (see pack_puzzle).
+    """
+    seed_sequence, n_boards, rows, cols, puzzles_per_board = args
+    generator = np.random.default_rng(seed_sequence)
+    attributes, planes = generate_game_maps(generator, n_boards, rows, cols)
+    n_base = len(get_base_attributes())
+    topology = get_hex_topology(rows, cols)
+
+    records = []
+    for board_planes in planes:
+        board = unstack_game_map(attributes, board_planes, rows, cols)
+        triples = find_unique_hint_triples(board)
+        if puzzles_per_board is not None and len(triples) > puzzles_per_board:
+            chosen = generator.choice(len(triples), puzzles_per_board, replace=False)
+            triples = [triples[i] for i in chosen]
+
+        for hints, cryptid in triples:
+            # Shuffle which player gets which hint
+            hint_ids = [hint_id(hints[i]) for i in generator.permutation(3)]
+            records.append(
+                pack_puzzle(
+                    rows, cols, board_planes[:n_base], hint_ids, topology.index[cryptid]
+                )
+            )
+    return records
+
+
+def farm_puzzles(
+    seed,
+    n_shards,
+    boards_per_shard,
+    rows=11,
+    cols=8,
+    store_dir="/opt/container/output/puzzles",
+    puzzles_per_board=None,
+    processes=None,
+):
+    """
+    Farm puzzles in parallel and append every new one to a puzzle store.
+
+    Shards run on a process pool, each with an independent child of SeedSequence(seed).
+    Results stream back to this process, the single writer, which skips puzzles whose
+    unique code is already in the store.
+
+    Args:
+    seed (int or None): Root seed of the run.
+    n_shards (int): Number of shards (pool tasks).
+    boards_per_shard (int): Number of boards generated per shard.
+    rows (int): Number of rows in the grid.
+    cols (int): Number of columns in the grid.
+    store_dir (str): Directory of the PuzzleStore the puzzles are appended to.
+    puzzles_per_board (int or None): Maximum number of puzzles kept per board, None for all.
+    processes (int or None): Pool size, None for one process per CPU.
+
+    Returns:
+    tuple: (number of puzzles written, number of duplicates skipped).
+    """
+    store = PuzzleStore(store_dir)
+    seed_sequences = np.random.SeedSequence(seed).spawn(n_shards)
+    tasks = [
+        (ss, boards_per_shard, rows, cols, puzzles_per_board) for ss in seed_sequences
+    ]
+
+    written = duplicates = 0
+    with mp.Pool(processes) as pool:
+        for records in pool.imap_unordered(farm_shard, tasks):
+            for record in records:
+                _, added = store.append_record(record)
+                written += added
+                duplicates += not added
+            print(f"Written {written} puzzles, skipped {duplicates} duplicates")
+    return written, duplicates
@@ -2,59 +2,173 @@ import hashlib
 import itertools
 import json
 import multiprocessing as mp
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
+import numpy as np
+
+from cryptid.bitboard import BitBoard
 from cryptid.board import generate_all_structures, get_all_animals
+from cryptid.game_state import GameState
+from cryptid.interning import intern_hint, intern_move, intern_state
+from cryptid.q_table import (
+    QTable,
+    ShardedQTable,
+    get_interned,
+    get_many_interned,
+    set_interned,
+)
+from cryptid.zobrist import ZobristHash
 from utils.graph_generate_landscape import get_terrain_types
-from utils.graph_utils import generate_unique_code, serialize_graph
 
 
 def process_move(args):
     game_map, move, player, my_placements = args
 
-    possible_states = generate_states(move, player, my_placements)
-    final_states = []
+    tracker = attached(game_map, "hint_tracker") or HintTracker.from_graph(game_map)
+    state = GameState.from_graph(game_map, tracker.copy())
     state_code_dict = {}
-    for state in possible_states:
-        state_key = tuple(sorted(state))
+    return evaluate_move_states(state, move, player, my_placements), state_code_dict
 
-        game_map_copy = game_map.copy()
-        for player, node, is_disc in state:
-            place_player_piece(game_map_copy, node, player, is_disc)
-        # too much lock in with this logic. We need to play vs the others
-        # state_code = process_move_mapcode(game_map_copy, player)
-        unique_code = process_move_hintcode(game_map_copy, player)
 
-        final_states.append(unique_code)
-    # Ensure final_states contains only unique values
-    final_states = list(set(final_states))
-    return move + (final_states,), state_code_dict
+def save_q_matrix(q_matrix, directory="/opt/container/output/qtable"):
+    """
+    Save the Q-matrix, appending only the entries changed since it was read.
 
+    Args:
+    q_matrix (ShardedQTable, QTable or dict): The Q-matrix. A dict is merged into the table
+    in directory.
+    directory (str): The Q-table directory, used for dicts.
+    """
+    if not isinstance(q_matrix, (ShardedQTable, QTable)):
+        q_table = ShardedQTable(directory)
+        q_table.update(q_matrix)
+        q_matrix = q_table
+    q_matrix.save()
 
-def save_q_matrix(q_matrix):
-    import pickle
 
-    with open("/opt/container/output/qmatrix.pkl", "wb") as f:
-        pickle.dump(q_matrix, f)
+def read_qmatrix(
+    directory="/opt/container/output/qtable",
+    legacy_path="/opt/container/output/qmatrix.pkl",
+    hints=(),
+):
+    """
+    Open the Q-table, sharded by hint, migrating older formats on first use.
 
+    Both the pickled Q-matrix dict and a single, unsharded Q-table in directory are split
+    into per-hint shards.
 
-def read_qmatrix():
+    Args:
+    directory (str): The Q-table directory.
+    legacy_path (str or None): The pickled dict written by earlier versions, None to not
+    migrate one.
+    hints (iterable): Hints whose shards are loaded right away, other shards load lazily.
+
+    Returns:
+    ShardedQTable: The Q-table, usable like the Q-matrix dict.
+    """
     import os
     import pickle
 
-    qmatrix_path = "/opt/container/output/qmatrix.pkl"
-    if os.path.exists(qmatrix_path):
-        with open(qmatrix_path, "rb") as f:
-            return pickle.load(f)
-    else:
-        return {}
+    migrate = None
+    if os.path.exists(os.path.join(directory, "states.txt")):
+        migrate = dict(QTable(directory).items())
+    elif (
+        legacy_path is not None
+        and not os.path.isdir(directory)
+        and os.path.exists(legacy_path)
+    ):
+        with open(legacy_path, "rb") as f:
+            migrate = pickle.load(f)
+
+    q_table = ShardedQTable(directory, hints)
+    if migrate is not None:
+        q_table.update(migrate)
+        q_table.save()
+        q_table.compact()
+        # Drop the unsharded files, now that their entries live in the shards
+        flat_files = ["states.txt", "hints.txt", "moves.txt", "table.npy"]
+        for name in flat_files + ["keys.npy", "values.npy", "log.bin"]:
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(os.path.join(directory, name))
+    return q_table
 
 
 def get_q_value(q_matrix, move, state, hint):
     # Return the Q-value for a given state-action pair, defaulting to 1 if unknown
-    # Sort the hint list and convert it to a tuple
-    sorted_hint = tuple(sorted(hint))
-    return q_matrix.get((state, sorted_hint, tuple(move)), 1)
+    # The interned hint is the sorted hint tuple
+    return get_interned(
+        q_matrix, intern_state(state), intern_hint(hint), intern_move(move), 1
+    )
+
+
+def score_moves(q_matrix, moves_with_states, hint):
+    """
+    Compute the average Q-value of every move over its predicted states.
+
+    All (state, hint, move) keys are interned and looked up in one bulk call, and the
+    averages are segment reductions over the flat array of Q-values.
+
+    Args:
+    q_matrix (dict-like): The Q-matrix.
+    moves_with_states (list): Moves followed by their states, a list or {state: multiplicity}
+    (see evaluate_move_states).
+    hint (list): The hint of the player to move.
+
+    Returns:
+    numpy.ndarray: The average Q-value of every move, unknown pairs counting as 1.
+    """
+    state_ids, weights, segments = [], [], []
+    move_ids = []
+    for k, move in enumerate(moves_with_states):
+        states = move[-1]
+        # States may come as {state: multiplicity}, see evaluate_move_states
+        if not isinstance(states, dict):
+            states = dict.fromkeys(states, 1)
+        move_ids.append(intern_move(move[:2]))
+        for state, weight in states.items():
+            state_ids.append(intern_state(state))
+            weights.append(weight)
+            segments.append(k)
+
+    segments = np.array(segments, dtype=np.int64)
+    q_values = get_many_interned(
+        q_matrix,
+        np.array(state_ids, dtype=np.int64),
+        intern_hint(hint),
+        np.array(move_ids, dtype=np.int64)[segments],
+        default=1,
+    )
+    weights = np.array(weights, dtype=np.float64)
+    n_moves = len(moves_with_states)
+    totals = np.bincount(segments, weights=weights * q_values, minlength=n_moves)
+    return totals / np.bincount(segments, weights=weights, minlength=n_moves)
+
+
+def top_indices(generator, scores, n):
+    """
+    Select the indices of the n highest scores, best first.
+
+    Every score above the n-th highest is kept; the remaining places go to scores tied with
+    the n-th highest, chosen at random.
+
+    Args:
+    generator (numpy.random.Generator): The random generator.
+    scores (numpy.ndarray): The scores.
+    n (int): Number of indices to select.
+
+    Returns:
+    numpy.ndarray: The selected indices, sorted by descending score.
+    """
+    if len(scores) <= n:
+        return np.argsort(-scores, kind="stable")
+    cutoff = -np.partition(-scores, n - 1)[n - 1]
+    above = np.flatnonzero(scores > cutoff)
+    tied = np.flatnonzero(scores == cutoff)
+    chosen = np.concatenate(
+        [above, generator.choice(tied, n - len(above), replace=False)]
+    )
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
 
 
 def select_top_moves(
@@ -64,34 +178,10 @@ def select_top_moves(
         index = generator.integers(0, len(moves_with_states))
         return [moves_with_states[index]]
 
-    scored_moves = []
-    for move in moves_with_states:
-        states = move[-1]
-        # Calculate the average Q-value across all possible resulting states
-        # This accounts for the uncertainty in the outcome of each move
-        avg_q_value = sum(
-            get_q_value(q_matrix, move[:2], state, hint) for state in states
-        ) / len(states)
-        scored_moves.append((move, avg_q_value))
-
-    # Sort moves by their average Q-value in descending order
-    sorted_moves = sorted(scored_moves, key=lambda x: x[1], reverse=True)
-
-    # If we have fewer moves than requested, return all of them
-    if len(sorted_moves) <= n:
-        return [move for move, _ in sorted_moves]
-
-    # Find the Q-value of the nth move
-    cutoff_score = sorted_moves[n - 1][1]
-    # Select all moves with Q-value greater than or equal to the cutoff
-    top_moves = [move for move, score in sorted_moves if score >= cutoff_score]
-
-    # If we have more than n moves due to ties, randomly select n of them
-    if len(top_moves) > n:
-        indices = generator.choice(range(len(top_moves)), size=n, replace=False)
-        return [top_moves[i] for i in indices]
-    else:
-        return top_moves
+    # Calculate the average Q-value across all possible resulting states
+    # This accounts for the uncertainty in the outcome of each move
+    scores = score_moves(q_matrix, moves_with_states, hint)
+    return [moves_with_states[i] for i in top_indices(generator, scores, n)]
 
 
 def find_available_cube_moves(game_map, player, hints):
@@ -106,24 +196,12 @@ def select_top_cube_moves(
         index = generator.integers(0, len(cube_moves))
         return [cube_moves[index]]
 
-    scored_moves = []
-    for move in cube_moves:
-        q_value = get_q_value(q_matrix, move, None, hint)  # No state for cube moves
-        scored_moves.append((move, q_value))
-
-    sorted_moves = sorted(scored_moves, key=lambda x: x[1], reverse=True)
-
-    if len(sorted_moves) <= n:
-        return [move for move, _ in sorted_moves]
-
-    cutoff_score = sorted_moves[n - 1][1]
-    top_moves = [move for move, score in sorted_moves if score >= cutoff_score]
-
-    if len(top_moves) > n:
-        indices = generator.choice(range(len(top_moves)), size=n, replace=False)
-        return [top_moves[i] for i in indices]
-    else:
-        return top_moves
+    # No state for cube moves
+    move_ids = np.array([intern_move(move) for move in cube_moves], dtype=np.int64)
+    scores = get_many_interned(
+        q_matrix, intern_state(None), intern_hint(hint), move_ids, default=1
+    )
+    return [cube_moves[i] for i in top_indices(generator, scores, n)]
 
 
 def policy_cube(generator, top_cube_moves):
@@ -198,8 +276,151 @@ def generate_all_hints() -> Dict[str, List[str]]:
     return categories
 
 
-# write a function to see if a hint applies
-# then one that loops through all hints to see how many apply
+@lru_cache(maxsize=None)
+def get_hint_catalog() -> Tuple[Tuple[str, ...], ...]:
+    """
+    List every hint of generate_all_hints in a stable order.
+
+    The position of a hint in the catalog is its hint ID.
+
+    Returns:
+    Tuple[Tuple[str, ...], ...]: All hints, category by category.
+    """
+    return tuple(
+        hint for category in generate_all_hints().values() for hint in category
+    )
+
+
+@lru_cache(maxsize=None)
+def get_hint_ids() -> Dict[Tuple[str, ...], int]:
+    """
+    Map every catalog hint to its hint ID.
+
+    Returns:
+    Dict[Tuple[str, ...], int]: The position of each hint in get_hint_catalog.
+    """
+    return {hint: i for i, hint in enumerate(get_hint_catalog())}
+
+
+def hint_id(hint) -> int:
+    """
+    Look up the hint ID of a hint given as any sequence of attribute names.
+
+    Args:
+    hint: The hint, e.g. a tuple, list or array of attribute names.
+
+    Returns:
+    int: The position of the hint in get_hint_catalog.
+
+    Raises:
+    KeyError: If the hint is not in the catalog.
+    """
+    return get_hint_ids()[tuple(hint)]
+
+
+def evaluate_hint_masks(board, hints=None):
+    """
+    Evaluate hints to the mask of cells where they apply.
+
+    Args:
+    board: The game map as a BitBoard or networkx graph.
+    hints: The hints to evaluate (default is the full hint catalog).
+
+    Returns:
+    list: One cell mask per hint, in the order of hints.
+    """
+    if not isinstance(board, BitBoard):
+        board = BitBoard.from_graph(board)
+    hints = get_hint_catalog() if hints is None else hints
+    return [board.any_mask(hint) for hint in hints]
+
+
+def find_unique_hint_triples(board):
+    """
+    Enumerate every triple of distinct hints that singles out exactly one cell.
+
+    Every catalog hint is evaluated to a cell mask once; triples are then checked by ANDing
+    masks, skipping all triples whose first two hints already have no cell in common.
+
+    Args:
+    board: The game map as a BitBoard or networkx graph.
+
+    Returns:
+    list: (hints, cell) pairs, hints being a tuple of three catalog hints and cell the only
+    node on which all three apply.
+    """
+    if not isinstance(board, BitBoard):
+        board = BitBoard.from_graph(board)
+    catalog = get_hint_catalog()
+    masks = evaluate_hint_masks(board, catalog)
+
+    triples = []
+    n_hints = len(catalog)
+    for i in range(n_hints):
+        for j in range(i + 1, n_hints):
+            pair = masks[i] & masks[j]
+            if not pair:
+                continue
+            for k in range(j + 1, n_hints):
+                cells = pair & masks[k]
+                # A single set bit means exactly one fitting cell
+                if cells and not cells & (cells - 1):
+                    triples.append(
+                        (
+                            (catalog[i], catalog[j], catalog[k]),
+                            board.cells[cells.bit_length() - 1],
+                        )
+                    )
+    return triples
+
+
+def sample_puzzle(generator, board, cell=None):
+    """
+    Sample a puzzle by picking the cryptid cell first and then hints consistent with it.
+
+    Only hints that apply on the target cell are considered. Pairs are tried in random order;
+    as soon as a pair already singles out the target any further consistent hint completes the
+    puzzle, otherwise a third hint must reduce the intersection to the target. The work per
+    cell is bounded by the number of hint triples, so there is no rejection sampling of boards.
+
+    Args:
+    generator (numpy.random.Generator): The random number generator.
+    board: The game map as a BitBoard or networkx graph.
+    cell: The cryptid cell (default is to try cells in random order).
+
+    Returns:
+    tuple or None: (hints, cell) with a tuple of three distinct hints in random player order,
+    or None if no hint triple singles out any of the tried cells.
+    """
+    if not isinstance(board, BitBoard):
+        board = BitBoard.from_graph(board)
+    catalog = get_hint_catalog()
+    masks = evaluate_hint_masks(board, catalog)
+
+    if cell is None:
+        targets = [board.cells[i] for i in generator.permutation(len(board.cells))]
+    else:
+        targets = [cell]
+
+    for target in targets:
+        bit = 1 << board.index[target]
+        candidates = [
+            int(h) for h in generator.permutation(len(catalog)) if masks[h] & bit
+        ]
+        for a, i in enumerate(candidates):
+            for b in range(a + 1, len(candidates)):
+                j = candidates[b]
+                pair = masks[i] & masks[j]
+                if pair == bit:
+                    # The pair is already unique, any other consistent hint completes it
+                    third = [k for k in candidates if k != i and k != j]
+                else:
+                    third = [k for k in candidates[b + 1 :] if pair & masks[k] == bit]
+                if third:
+                    triple = [i, j, third[0]]
+                    hints = tuple(catalog[triple[p]] for p in generator.permutation(3))
+                    return hints, target
+    return None
 
 
 def verify_map_attributes(G):
@@ -233,7 +454,55 @@ def generate_hint_combinations(generator):
     return hint_combinations
 
 
+def compile_hint_masks(G):
+    """
+    Precompute the cell mask of every catalog hint for a game map.
+
+    The masks are stored on the graph (G.graph["hint_masks"], indexed by hint ID, and
+    G.graph["cell_index"], the bit of every node), after which hint_applies,
+    count_tiles_fitting_hints, find_available_placements and find_available_moves answer
+    catalog hints with bit tests. Hints only refer to board attributes, which do not change
+    during a game, so the masks stay valid while pieces are placed.
+
+    Args:
+    G (networkx.Graph): The game map.
+
+    Returns:
+    list: The cell mask of every hint, indexed by hint ID.
+    """
+    board = BitBoard.from_graph(G)
+    masks = evaluate_hint_masks(board)
+    G.graph["hint_masks"] = masks
+    G.graph["cell_index"] = board.index
+    return masks
+
+
+def compiled_hint_mask(G, hint):
+    """
+    Return the precomputed cell mask of a hint.
+
+    Args:
+    G: The game map as a BitBoard or networkx graph.
+    hint: The hint.
+
+    Returns:
+    int or None: The mask, or None if the graph has no compiled masks or the hint is not
+    in the catalog.
+    """
+    if isinstance(G, BitBoard):
+        return G.any_mask(hint)
+    masks = G.graph.get("hint_masks")
+    if masks is None:
+        return None
+    hint_index = get_hint_ids().get(tuple(hint))
+    return None if hint_index is None else masks[hint_index]
+
+
 def hint_applies(G, node, hint):
+    mask = compiled_hint_mask(G, hint)
+    if mask is not None:
+        index = G.index if isinstance(G, BitBoard) else G.graph["cell_index"]
+        return bool((mask >> index[node]) & 1)
     for attribute in hint:
         if G.nodes[node].get(attribute, False):
             return True
@@ -241,6 +510,15 @@ def hint_applies(G, node, hint):
 
 
 def count_tiles_fitting_hints(G, hints):
+    masks = [compiled_hint_mask(G, hint) for hint in hints]
+    if all(mask is not None for mask in masks):
+        nodes = G.cells if isinstance(G, BitBoard) else list(G.nodes())
+        fitting = (1 << len(nodes)) - 1
+        for mask in masks:
+            fitting &= mask
+        fitting_nodes = [node for i, node in enumerate(nodes) if (fitting >> i) & 1]
+        return len(fitting_nodes), fitting_nodes
+
     count = 0
     fitting_nodes = []
     for node in G.nodes():
@@ -250,11 +528,176 @@ def count_tiles_fitting_hints(G, hints):
     return count, fitting_nodes
 
 
+class HintTracker:
+    """
+    Track, per player, which catalog hints are still possible given the cubes placed so far.
+
+    A hint stays possible for a player while at least one of its flags is absent from every
+    cell holding one of that player's cubes, as in hint_applies_everywhere. Every (hint, flag)
+    pair is a slot; a cube on a cell kills the slots whose flag is present there. Adding a
+    cube therefore costs one mask operation plus one pass over the still-possible hints.
+    """
+
+    players = ("player1", "player2", "player3")
+
+    def __init__(self, hint_slots, cell_slots, cell_index):
+        self.hint_slots = hint_slots
+        self.cell_slots = cell_slots
+        self.cell_index = cell_index
+        all_slots = 0
+        for slots in hint_slots:
+            all_slots |= slots
+        all_hints = (1 << len(hint_slots)) - 1
+        self.alive_slots = {player: all_slots for player in self.players}
+        self.possible = {player: all_hints for player in self.players}
+
+    @classmethod
+    def from_graph(cls, G):
+        """
+        Build a tracker for a game map, accounting for the cubes already on it.
+
+        Args:
+        G (networkx.Graph): The game map.
+
+        Returns:
+        HintTracker: The tracker.
+        """
+        return cls.from_board(BitBoard.from_graph(G))
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Build a tracker for a bitboard, accounting for the cube attributes set on it.
+
+        Args:
+        board (BitBoard): The enriched board.
+
+        Returns:
+        HintTracker: The tracker.
+        """
+        hint_slots = []
+        cell_slots = [0] * len(board)
+        slot = 0
+        for hint in get_hint_catalog():
+            slots = 0
+            for flag in hint:
+                slots |= 1 << slot
+                for node in board.cells_in(board.mask(flag)):
+                    cell_slots[board.index[node]] |= 1 << slot
+                slot += 1
+            hint_slots.append(slots)
+
+        tracker = cls(hint_slots, cell_slots, board.index)
+        for player in cls.players:
+            for node in board.cells_in(board.mask(f"cube_{player}")):
+                tracker.add_cube(player, node)
+        return tracker
+
+    def add_cube(self, player, node):
+        """Record a cube of player on node."""
+        alive = self.alive_slots[player] & ~self.cell_slots[self.cell_index[node]]
+        self.alive_slots[player] = alive
+        possible = self.possible[player]
+        remaining = possible
+        while remaining:
+            low = remaining & -remaining
+            if not alive & self.hint_slots[low.bit_length() - 1]:
+                possible &= ~low
+            remaining ^= low
+        self.possible[player] = possible
+
+    def group_cells(self, player, nodes):
+        """
+        Group cells on which a cube of player would leave the same possible hints.
+
+        A cube only changes the possible hints of its own player, so cubes in the same group
+        lead to the same hint counts.
+
+        Args:
+        player (str): The player placing the cube.
+        nodes (list): The candidate cells.
+
+        Returns:
+        list: Tuples (node, weight), one representative node per group with the group size.
+        """
+        alive = self.alive_slots[player]
+        possible = self.possible[player]
+        groups = {}
+        for node in nodes:
+            remaining_slots = alive & ~self.cell_slots[self.cell_index[node]]
+            key = possible
+            remaining = possible
+            while remaining:
+                low = remaining & -remaining
+                if not remaining_slots & self.hint_slots[low.bit_length() - 1]:
+                    key &= ~low
+                remaining ^= low
+            if key in groups:
+                groups[key][1] += 1
+            else:
+                groups[key] = [node, 1]
+        return [tuple(entry) for entry in groups.values()]
+
+    def count(self, player):
+        """Return the number of hints still possible for player."""
+        return self.possible[player].bit_count()
+
+    def counts(self):
+        """Return the number of possible hints of player1, player2 and player3."""
+        return tuple(self.count(player) for player in self.players)
+
+    def snapshot(self):
+        """Return the mutable part of the tracker, for restore."""
+        return dict(self.alive_slots), dict(self.possible)
+
+    def restore(self, snapshot):
+        """Reset the tracker to a snapshot."""
+        alive_slots, possible = snapshot
+        self.alive_slots = dict(alive_slots)
+        self.possible = dict(possible)
+
+    def copy(self):
+        tracker = HintTracker.__new__(HintTracker)
+        tracker.hint_slots = self.hint_slots
+        tracker.cell_slots = self.cell_slots
+        tracker.cell_index = self.cell_index
+        tracker.alive_slots = dict(self.alive_slots)
+        tracker.possible = dict(self.possible)
+        return tracker
+
+
+def attach(G, name, value):
+    """
+    Store mutable state of a game, such as its hint tracker, on the game map.
+
+    G.copy() copies G.graph shallowly, so a plain copy would share the object and corrupt
+    it when pieces are placed on the copy. The value is therefore stored together with
+    its graph, and attached only returns it for that graph: a plain copy falls back to
+    the slower paths that read the node attributes. copy_game_map copies the state too.
+
+    Args:
+    G (networkx.Graph): The game map.
+    name (str): The key in G.graph.
+    value (object): The state.
+    """
+    G.graph[name] = (G, value)
+
+
+def attached(G, name):
+    """Return state stored with attach, None if there is none or G is a plain copy."""
+    owner, value = G.graph.get(name, (None, None))
+    return value if owner is G else None
+
+
 def initialize_player_pieces(G):
     for node in G.nodes():
         for player in range(1, 4):
             G.nodes[node][f"disc_player{player}"] = False
             G.nodes[node][f"cube_player{player}"] = False
+    # From here on place_player_piece keeps the possible hints and the state hash up to date
+    tracker = HintTracker.from_graph(G)
+    attach(G, "hint_tracker", tracker)
+    attach(G, "zobrist", ZobristHash.from_graph(G, tracker.cell_index))
 
 
 def place_player_piece(G, node, player, is_disc):
@@ -262,13 +705,43 @@ def place_player_piece(G, node, player, is_disc):
     if player not in ["player1", "player2", "player3"]:
         raise ValueError("player must be 1, 2, or 3")
 
-    G.nodes[node][f"{piece_type}_{player}"] = True
+    attribute = f"{piece_type}_{player}"
+    already_placed = G.nodes[node].get(attribute, False)
+    G.nodes[node][attribute] = True
+    tracker = attached(G, "hint_tracker")
+    if tracker is not None and not is_disc:
+        tracker.add_cube(player, node)
+    zobrist = attached(G, "zobrist")
+    if zobrist is not None and not already_placed:
+        zobrist.toggle(node, player, piece_type)
+
+
+def copy_game_map(G):
+    """
+    Copy a game map together with its own copy of the hint tracker and state hash.
+
+    Args:
+    G (networkx.Graph): The game map.
+
+    Returns:
+    networkx.Graph: The copy. Pieces placed on it do not affect G.
+    """
+    G_copy = G.copy()
+    for name in ("hint_tracker", "zobrist"):
+        value = attached(G, name)
+        if value is not None:
+            attach(G_copy, name, value.copy())
+    return G_copy
 
 
 def find_available_placements(G, player_hint):
     available_placements = {"cube": [], "disc": []}
-    for node in G.nodes():
-        node_fits_hint = hint_applies(G, node, player_hint)
+    hint_mask = compiled_hint_mask(G, player_hint)
+    for i, node in enumerate(G.nodes()):
+        if hint_mask is not None:
+            node_fits_hint = (hint_mask >> i) & 1
+        else:
+            node_fits_hint = hint_applies(G, node, player_hint)
         piece_type = "disc" if node_fits_hint else "cube"
 
         # Check if there are no pieces of the current player
@@ -292,8 +765,9 @@ def find_available_placements(G, player_hint):
 def find_available_moves(G, player, hints):
     moves = []
     player_hint = hints[player]
+    hint_mask = compiled_hint_mask(G, player_hint)
 
-    for node in G.nodes():
+    for i, node in enumerate(G.nodes()):
         # Check if the node has no cube of any player and no disc of the current player
         no_cubes = not any(
             G.nodes[node].get(f"cube_player{i}", False) for i in range(1, 4)
@@ -307,7 +781,11 @@ def find_available_moves(G, player, hints):
                     moves.append(("question", node, other_player))
 
             # Add wild guess move if allowed by the player's hint
-            if hint_applies(G, node, player_hint):
+            if hint_mask is not None:
+                fits = (hint_mask >> i) & 1
+            else:
+                fits = hint_applies(G, node, player_hint)
+            if fits:
                 moves.append(("wild_guess", node))
 
     return moves
@@ -342,11 +820,50 @@ def generate_states(move, player, my_placements):
     return states
 
 
+def generate_weighted_states(move, player, my_placements, cube_classes):
+    """
+    Generate the resulting states of a move, one per class of equivalent cube placements.
+
+    Args:
+    move (tuple): The move.
+    player (str): The player making the move.
+    my_placements (dict): The available placements of the player.
+    cube_classes (list): Tuples (node, weight) from HintTracker.group_cells, covering
+    my_placements["cube"].
+
+    Returns:
+    list: Tuples (state, weight), the weight being the number of states of generate_states
+    the state stands for.
+    """
+    weights = dict(cube_classes)
+    representatives = {"cube": list(weights), "disc": my_placements["disc"]}
+    weighted_states = []
+    for state in generate_states(move, player, representatives):
+        last_player, node, is_disc = state[-1]
+        weight = 1
+        if last_player == player and not is_disc:
+            weight = weights[node]
+        weighted_states.append((state, weight))
+    return weighted_states
+
+
 def process_move_mapcode(G, current_player):
-    serialized = serialize_graph(G)
-    unique_code = generate_unique_code(serialized)
+    """
+    Return the code identifying the position on a game map.
 
-    return unique_code
+    The code is read from the Zobrist hash that place_player_piece keeps up to date (see
+    initialize_player_pieces), so no serialization is needed; maps without one are hashed
+    from scratch.
+
+    Args:
+    G (networkx.Graph): The game map.
+    current_player (str): The player to move, not part of the code.
+
+    Returns:
+    str: The 128-bit state code, as hex.
+    """
+    zobrist = attached(G, "zobrist") or ZobristHash.from_graph(G)
+    return zobrist.code()
 
 
 def hint_applies_everywhere(game_map, player, hint):
@@ -383,6 +900,10 @@ def hint_applies_everywhere(game_map, player, hint):
 
 
 def count_possible_hints_for_player(game_map, player):
+    tracker = attached(game_map, "hint_tracker")
+    if tracker is not None:
+        return tracker.count(player)
+
     all_hints = generate_all_hints()
     possible_hints_count = 0
     for category in all_hints.values():
@@ -393,6 +914,10 @@ def count_possible_hints_for_player(game_map, player):
 
 
 def count_possible_hints_for_all_players(game_map):
+    tracker = attached(game_map, "hint_tracker")
+    if tracker is not None:
+        return tracker.counts()
+
     player_order = ["player1", "player2", "player3"]
     hint_counts = []
 
@@ -403,15 +928,82 @@ def count_possible_hints_for_all_players(game_map):
     return tuple(hint_counts)
 
 
-def process_move_hintcode(G, player):
-    hints_counts = count_possible_hints_for_all_players(G)
-
+def format_hintcode(player, hints_counts):
     # by putting the player in front, we can take into account how much
     # the other players know about the current player
     return player + "-" + "-".join([f"{hint}" for hint in hints_counts])
 
 
-def find_predicted_states(game_map, my_moves, player, my_placements):
+def process_move_hintcode(G, player):
+    hints_counts = count_possible_hints_for_all_players(G)
+    return format_hintcode(player, hints_counts)
+
+
+def evaluate_move_states(
+    state, move, player, my_placements, cache=None, cube_classes=None
+):
+    """
+    Compute the unique state codes a move can lead to, with their multiplicity.
+
+    Cube placements of the player that leave the same possible hints are evaluated once
+    (see HintTracker.group_cells). Every resulting state is applied to the game state and undone
+    again, so no game map is copied. The state is left as it was found. With a cache, the
+    hint counts are looked up by cube occupancy first and only evaluated on a miss.
+
+    Args:
+    state (GameState): The current game state.
+    move (tuple): The move.
+    player (str): The player making the move.
+    my_placements (dict): The available placements of the player.
+    cache (StateCache): Optional cache of hint counts, keyed by GameState.cube_key.
+    cube_classes (list): The classes of my_placements["cube"], computed when not given.
+
+    Returns:
+    tuple: The move followed by a dict of the unique resulting state codes, mapping each
+    code to the number of states of generate_states leading to it.
+    """
+    if cube_classes is None:
+        cube_classes = state.tracker.group_cells(player, my_placements["cube"])
+    final_states = {}
+    for placements, weight in generate_weighted_states(
+        move, player, my_placements, cube_classes
+    ):
+        counts = None
+        if cache is not None:
+            key = state.cube_key(placements)
+            counts = cache.get(key)
+        if counts is None:
+            state.apply(placements)
+            counts = state.counts()
+            state.undo()
+            if cache is not None:
+                cache.put(key, counts)
+        # too much lock in with this logic. We need to play vs the others
+        # The code is keyed by the last player placing a piece
+        last_player = placements[-1][0] if placements else player
+        code = format_hintcode(last_player, counts)
+        final_states[code] = final_states.get(code, 0) + weight
+    return move + (final_states,)
+
+
+def find_predicted_states(game_map, my_moves, player, my_placements, pool=None):
+    """
+    Predict the resulting states of every move.
+
+    Args:
+    game_map (networkx.Graph): The current game map.
+    my_moves (list): The moves to evaluate.
+    player (str): The player to move.
+    my_placements (dict): The available placements of the player.
+    pool (EvaluationPool): Optional long-lived pool; without it a pool is started per call.
+
+    Returns:
+    list: Every move followed by its resulting state codes (see evaluate_move_states).
+    """
+    if pool is not None:
+        pool.update(game_map)
+        return pool.evaluate(my_moves, player, my_placements)
+
     print(f"Starting multiprocessing pool for {len(my_moves)} moves")
 
     with mp.Pool() as pool:
@@ -448,13 +1040,15 @@ def update_q_matrix(q_matrix, moves, final_state, player_won, **kwargs):
     # Iterate through moves in reverse order
     for i in range(len(moves) - 1, -1, -1):
         move, state, hint = moves[i]
-        # Generate a sorted tuple from the hint
-        hint_tuple = tuple(sorted(hint))
+        # Intern the key parts, the hint as a sorted tuple
+        hint_key = intern_hint(hint)
+        action_key = intern_move(move[:2])
+        state_key = intern_state(state)
 
         next_state = moves[i + 1][1] if i < len(moves) - 1 else final_state
 
         # Calculate the current Q-value using the hint tuple
-        current_q = q_matrix.get((state, hint_tuple, tuple(move[:2])), 0)
+        current_q = get_interned(q_matrix, state_key, hint_key, action_key, 0)
 
         # Calculate the reward for this move
         T = len(moves)
@@ -474,7 +1068,9 @@ def update_q_matrix(q_matrix, moves, final_state, player_won, **kwargs):
                 + (gamma ** (T - t)) * R
             )
         # Get the maximum Q-value for the next state
-        next_q_max = q_matrix.get((next_state, hint_tuple, tuple(move[:2])), 0)
+        next_q_max = get_interned(
+            q_matrix, intern_state(next_state), hint_key, action_key, 0
+        )
 
         # Update the Q-value
         new_q = current_q + learning_rate * (
@@ -482,6 +1078,6 @@ def update_q_matrix(q_matrix, moves, final_state, player_won, **kwargs):
         )
 
         # Store the updated Q-value
-        q_matrix[(state, hint_tuple, tuple(move[:2]))] = new_q
+        set_interned(q_matrix, state_key, hint_key, action_key, new_q)
 
     return q_matrix, final_reward + move_penalty * len(moves)
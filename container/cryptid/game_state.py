@@ -0,0 +1,118 @@
+class GameState:
+    """
+    Piece occupancy of a game, with apply/undo for evaluating hypothetical placements.
+
+    Every (piece, player) pair, e.g. "cube_player1", is one bitmask over cells, using the
+    same names as the node attributes of a game map. Cubes are also recorded in a hint
+    tracker (see game_rules.HintTracker). Applying placements costs a few bit operations
+    per piece instead of a copy of the game map, and undo restores the previous state.
+    """
+
+    players = ("player1", "player2", "player3")
+    pieces = ("cube", "disc")
+
+    def __init__(self, cells, tracker, occupancy=None):
+        """
+        Args:
+        cells (list): The cells of the board, in bit order.
+        tracker (HintTracker): The hint tracker, matching the cubes in occupancy.
+        occupancy (dict): Mask per piece attribute, e.g. {"cube_player1": mask}.
+        """
+        self.cells = list(cells)
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+        self.tracker = tracker
+        self.occupancy = {
+            f"{piece}_{player}": 0 for piece in self.pieces for player in self.players
+        }
+        self.occupancy.update(occupancy or {})
+        self.history = []
+
+    @classmethod
+    def from_graph(cls, G, tracker):
+        """
+        Read the pieces placed on a game map.
+
+        Args:
+        G (networkx.Graph): The game map.
+        tracker (HintTracker): The hint tracker of the game map. The state takes ownership,
+        pass a copy to keep the original untouched.
+
+        Returns:
+        GameState: The state.
+        """
+        state = cls(G.nodes, tracker)
+        for i, attrs in enumerate(G.nodes.values()):
+            for attr in state.occupancy:
+                if attrs.get(attr, False):
+                    state.occupancy[attr] |= 1 << i
+        return state
+
+    def apply(self, placements):
+        """
+        Place pieces, remembering how to undo them.
+
+        Args:
+        placements (iterable): Tuples (player, node, is_disc), as produced by generate_states.
+        """
+        changed = []
+        snapshot = self.tracker.snapshot()
+        for player, node, is_disc in placements:
+            attr = f"{'disc' if is_disc else 'cube'}_{player}"
+            changed.append((attr, self.occupancy[attr]))
+            self.occupancy[attr] |= 1 << self.index[node]
+            if not is_disc:
+                self.tracker.add_cube(player, node)
+        self.history.append((changed, snapshot))
+
+    def place(self, player, node, is_disc):
+        """Place a piece for good, without an undo record."""
+        attr = f"{'disc' if is_disc else 'cube'}_{player}"
+        self.occupancy[attr] |= 1 << self.index[node]
+        if not is_disc:
+            self.tracker.add_cube(player, node)
+
+    def undo(self):
+        """Remove the pieces of the last apply."""
+        changed, snapshot = self.history.pop()
+        for attr, mask in reversed(changed):
+            self.occupancy[attr] = mask
+        self.tracker.restore(snapshot)
+
+    def has_piece(self, node, piece, player):
+        """Check whether player has a piece ("cube" or "disc") on node."""
+        return bool((self.occupancy[f"{piece}_{player}"] >> self.index[node]) & 1)
+
+    def mask(self, piece=None, player=None):
+        """Return the cells holding pieces, optionally restricted to a piece type or player."""
+        result = 0
+        for p in self.pieces if piece is None else (piece,):
+            for q in self.players if player is None else (player,):
+                result |= self.occupancy[f"{p}_{q}"]
+        return result
+
+    def cube_key(self, placements=()):
+        """
+        Return the canonical key of the cube occupancy, optionally after extra placements.
+
+        The possible hints of every player only depend on the cubes, so states with the same
+        key have the same hint counts, whatever the discs or the order of placement.
+
+        Args:
+        placements (iterable): Tuples (player, node, is_disc) to include, without applying them.
+
+        Returns:
+        tuple: The cube mask of player1, player2 and player3.
+        """
+        cubes = {player: self.occupancy[f"cube_{player}"] for player in self.players}
+        for player, node, is_disc in placements:
+            if not is_disc:
+                cubes[player] |= 1 << self.index[node]
+        return tuple(cubes[player] for player in self.players)
+
+    def counts(self):
+        """Return the number of possible hints of player1, player2 and player3."""
+        return self.tracker.counts()
+
+    def copy(self):
+        """Return an independent state with the same pieces and an empty history."""
+        return GameState(self.cells, self.tracker.copy(), self.occupancy)
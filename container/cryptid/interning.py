@@ -0,0 +1,133 @@
+import ast
+
+import numpy as np
+
+
+class Interner:
+    """
+    Assign consecutive integer ids to hashable values.
+
+    Values are persisted one repr per line, append-only, so they must be literals
+    (strings, numbers and tuples of those), which is what states, hints and moves are.
+    """
+
+    def __init__(self, values=()):
+        self.values = []
+        self.ids = {}
+        self.saved = 0
+        for value in values:
+            self.id(value)
+
+    def id(self, value, add=True):
+        """Return the id of a value, assigning a new one if add is set, else None if unknown."""
+        i = self.ids.get(value)
+        if i is None and add:
+            i = len(self.values)
+            self.ids[value] = i
+            self.values.append(value)
+        return i
+
+    def value(self, i):
+        return self.values[i]
+
+    def load(self, path):
+        """Read the values saved at path, assigning ids in file order."""
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    # Still being appended by a writer
+                    break
+                self.id(ast.literal_eval(line))
+        self.saved = len(self.values)
+
+    def append_new(self, path):
+        """Append the values added since the last load or save to path."""
+        with open(path, "a", encoding="utf-8") as f:
+            for value in self.values[self.saved :]:
+                f.write(repr(value) + "\n")
+        self.saved = len(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+
+# Session-wide ids, shared by the Q-matrix lookups, the Q-table shards and the replay memory.
+# They are only valid within one process: whatever leaves the process (files, results of
+# pool workers) is translated back to the values first.
+STATES = Interner()
+HINTS = Interner()
+MOVES = Interner()
+SESSION = {"states": STATES, "hints": HINTS, "moves": MOVES}
+
+# Hint as given, e.g. a list in a player's order, to the id of the sorted hint tuple
+_hint_ids = {}
+# Number of times the session was cleared
+_generation = 0
+
+
+def clear_session():
+    """
+    Forget every session id, e.g. between the tasks of a long-lived worker process.
+
+    Ids handed out before are invalid afterwards. Q-tables notice the change and
+    drop their translations, see session_generation.
+    """
+    global _generation
+    for interner in SESSION.values():
+        interner.values.clear()
+        interner.ids.clear()
+        interner.saved = 0
+    _hint_ids.clear()
+    _generation += 1
+
+
+def session_generation():
+    """Return a number that changes whenever the session is cleared."""
+    return _generation
+
+
+def intern_state(state):
+    """Return the session id of a state code, None (the state of cube moves) included."""
+    return STATES.id(state)
+
+
+def intern_hint(hint):
+    """
+    Return the session id of a hint.
+
+    Hints are interned as sorted tuples, so the order of the elements does not matter. The
+    sort only runs the first time a hint is seen.
+
+    Args:
+    hint (list or tuple): The hint elements.
+
+    Returns:
+    int: The id.
+    """
+    key = tuple(hint)
+    i = _hint_ids.get(key)
+    if i is None:
+        i = _hint_ids[key] = HINTS.id(tuple(sorted(key)))
+    return i
+
+
+def intern_move(move):
+    """Return the session id of a move tuple such as ("question", (3, 4))."""
+    return MOVES.id(tuple(move))
+
+
+def intern_key(key):
+    """Return the session ids of a (state, hint, move) Q-matrix key."""
+    state, hint, move = key
+    return intern_state(state), intern_hint(hint), intern_move(move)
+
+
+def intern_keys(keys):
+    """Return the session ids of a list of Q-matrix keys, as three int64 arrays."""
+    ids = np.array([intern_key(key) for key in keys], dtype=np.int64).reshape(-1, 3)
+    return ids[:, 0], ids[:, 1], ids[:, 2]
+
+
+def key_values(state, hint, move):
+    """Return the (state, sorted hint tuple, move) Q-matrix key of session ids."""
+    return STATES.value(state), HINTS.value(hint), MOVES.value(move)
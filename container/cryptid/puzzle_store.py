@@ -0,0 +1,419 @@
+import hashlib
+import json
+import os
+from functools import cached_property
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from cryptid.bitboard import BitBoard
+from cryptid.board import get_base_attributes, get_board_attributes
+from cryptid.game_rules import count_tiles_fitting_hints, get_hint_catalog, hint_id
+from utils.graph_generate_landscape import get_hex_topology
+from utils.graph_utils import neighbor_planes
+
+# Fixed-size header of every record, followed by the bit-packed base planes
+RECORD_HEADER = np.dtype(
+    [
+        ("rows", "u1"),
+        ("cols", "u1"),
+        ("n_planes", "u1"),
+        ("hints", "<u2", (3,)),
+        ("cryptid", "<u2"),
+    ]
+)
+
+# One fixed-size index entry per record, so puzzle k is at byte k * itemsize
+INDEX_ENTRY = np.dtype([("offset", "<u8"), ("length", "<u4"), ("code", "u1", (32,))])
+
+
+class StoredPuzzle(NamedTuple):
+    code: str
+    rows: int
+    cols: int
+    hints: Tuple[Tuple[str, ...], ...]
+    cryptid: Tuple[int, int]
+    planes: np.ndarray
+
+
+def pack_puzzle(rows, cols, base_planes, hint_ids, cryptid_index):
+    """
+    Pack a puzzle into a compact binary record.
+
+    Args:
+    rows (int): Number of rows in the grid.
+    cols (int): Number of columns in the grid.
+    base_planes (numpy.ndarray): Boolean array of shape (len(get_base_attributes()), cells).
+    hint_ids (list): The catalog IDs of the hints of player1, player2 and player3.
+    cryptid_index (int): The cell index of the solution.
+
+    Returns:
+    bytes: The record. Derived planes and edges are not stored; they are recomputed.
+    """
+    header = np.zeros(1, dtype=RECORD_HEADER)
+    header["rows"] = rows
+    header["cols"] = cols
+    header["n_planes"] = len(base_planes)
+    header["hints"] = hint_ids
+    header["cryptid"] = cryptid_index
+    packed = np.packbits(np.asarray(base_planes, dtype=bool), axis=1, bitorder="little")
+    return header.tobytes() + packed.tobytes()
+
+
+def unpack_puzzle(code, record):
+    """
+    Unpack a binary record made by pack_puzzle.
+
+    Args:
+    code (str): The unique code of the puzzle.
+    record (bytes or numpy.ndarray): The record.
+
+    Returns:
+    StoredPuzzle: The puzzle with its base planes.
+    """
+    record = np.frombuffer(record, dtype=np.uint8)
+    header = record[: RECORD_HEADER.itemsize].view(RECORD_HEADER)[0]
+    rows, cols, n_planes = (
+        int(header["rows"]),
+        int(header["cols"]),
+        int(header["n_planes"]),
+    )
+    n_cells = rows * cols
+    packed = record[RECORD_HEADER.itemsize :].reshape(n_planes, -1)
+    planes = np.unpackbits(packed, axis=1, bitorder="little")[:, :n_cells].astype(bool)
+    catalog = get_hint_catalog()
+    hints = tuple(catalog[i] for i in header["hints"].tolist())
+    cryptid = get_hex_topology(rows, cols).nodes[int(header["cryptid"])]
+    return StoredPuzzle(code, rows, cols, hints, cryptid, planes)
+
+
+def puzzle_code(record):
+    """Return the unique code of a packed puzzle: the SHA-256 of its record."""
+    return hashlib.sha256(record).hexdigest()
+
+
+def pack_game_map(board, hints, rows, cols):
+    """
+    Pack a game map and its hints, finding the solution cell.
+
+    Args:
+    board: The game map as a BitBoard or networkx graph, cells in row-major order.
+    hints (list): The hints of player1, player2 and player3.
+    rows (int): Number of rows in the grid.
+    cols (int): Number of columns in the grid.
+
+    Returns:
+    bytes: The record.
+
+    Raises:
+    ValueError: If the hints do not single out exactly one cell.
+    """
+    if not isinstance(board, BitBoard):
+        board = BitBoard.from_graph(board)
+    count, fitting_nodes = count_tiles_fitting_hints(board, hints)
+    if count != 1:
+        raise ValueError(f"Hints fit {count} tiles instead of exactly one")
+    topology = get_hex_topology(rows, cols)
+    return pack_puzzle(
+        rows,
+        cols,
+        board.planes(get_base_attributes()),
+        [hint_id(hint) for hint in hints],
+        topology.index[fitting_nodes[0]],
+    )
+
+
+def expand_puzzle(puzzle):
+    """
+    Recompute the enriched bitboard of a stored puzzle.
+
+    Args:
+    puzzle (StoredPuzzle): A puzzle read from the store.
+
+    Returns:
+    BitBoard: The board with base and neighbor attributes and the grid edges.
+    """
+    topology = get_hex_topology(puzzle.rows, puzzle.cols)
+    levels = neighbor_planes(topology.adjacency, puzzle.planes, levels=3)
+    planes = np.concatenate([puzzle.planes] + levels)
+    return BitBoard.from_planes(
+        topology.nodes, get_board_attributes(3), planes, topology.edges
+    )
+
+
+class Puzzle:
+    """
+    A loaded puzzle that only materializes what is used.
+
+    Hints, solution and base planes are available right away; the enriched bitboard and the
+    networkx view are built on first access and then cached.
+    """
+
+    def __init__(self, code, rows, cols, hints, cryptid, planes=None, board=None):
+        self.code = code
+        self.rows = rows
+        self.cols = cols
+        self.hints = tuple(tuple(hint) for hint in hints)
+        self.cryptid = cryptid
+        if planes is not None:
+            self.planes = planes
+        if board is not None:
+            self.board = board
+
+    @classmethod
+    def from_stored(cls, stored):
+        return cls(
+            stored.code,
+            stored.rows,
+            stored.cols,
+            stored.hints,
+            stored.cryptid,
+            planes=stored.planes,
+        )
+
+    @property
+    def hints_players(self):
+        """The hints keyed by player, as used by the game rules."""
+        return {f"player{i+1}": list(hint) for i, hint in enumerate(self.hints)}
+
+    @cached_property
+    def planes(self):
+        """The base planes, shape (len(get_base_attributes()), cells)."""
+        return self.board.planes(get_base_attributes())
+
+    @cached_property
+    def board(self):
+        """The enriched bitboard."""
+        return expand_puzzle(self)
+
+    @cached_property
+    def graph(self):
+        """The networkx view of the enriched board."""
+        return self.board.to_graph()
+
+
+class PuzzleStore:
+    """
+    Append-only store of packed puzzles with a fixed-size index.
+
+    The directory holds puzzles.dat, the concatenated records, and puzzles.idx, one
+    INDEX_ENTRY per record. Both are memory-mapped for reading, so fetching puzzle k is O(1).
+    Records are written before their index entry, so an interrupted append leaves at most an
+    unindexed tail that readers ignore.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.data_path = os.path.join(directory, "puzzles.dat")
+        self.index_path = os.path.join(directory, "puzzles.idx")
+        self._index = None
+        self._data = None
+        # Dedupe set, extended incrementally: it reflects the first _n_codes index entries
+        self._codes = set()
+        self._n_codes = 0
+
+    def _n_entries(self):
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path) // INDEX_ENTRY.itemsize
+
+    def _load(self):
+        n_entries = self._n_entries()
+        if self._index is not None and len(self._index) == n_entries:
+            return
+        if n_entries == 0:
+            self._index = np.zeros(0, dtype=INDEX_ENTRY)
+            self._data = np.zeros(0, dtype=np.uint8)
+        else:
+            self._index = np.memmap(
+                self.index_path, dtype=INDEX_ENTRY, mode="r", shape=(n_entries,)
+            )
+            self._data = np.memmap(self.data_path, dtype=np.uint8, mode="r")
+
+    def __len__(self):
+        self._load()
+        return len(self._index)
+
+    def codes(self):
+        """
+        Return the set of unique codes in the store.
+
+        The set is kept between calls and only extended with the index entries appended
+        since, e.g. by another process, so checking a code does not rescan the store.
+        """
+        n_entries = self._n_entries()
+        if n_entries > self._n_codes:
+            entries = np.fromfile(
+                self.index_path,
+                dtype=INDEX_ENTRY,
+                count=n_entries - self._n_codes,
+                offset=self._n_codes * INDEX_ENTRY.itemsize,
+            )
+            self._codes.update(code.tobytes().hex() for code in entries["code"])
+            self._n_codes = n_entries
+        return self._codes
+
+    def __contains__(self, code):
+        return code in self.codes()
+
+    def record(self, k):
+        """Return the packed record of puzzle k."""
+        self._load()
+        entry = self._index[k]
+        offset, length = int(entry["offset"]), int(entry["length"])
+        return entry["code"].tobytes().hex(), self._data[offset : offset + length]
+
+    def __getitem__(self, k):
+        return unpack_puzzle(*self.record(k))
+
+    def load(self, k):
+        """Load puzzle k as a lazy Puzzle."""
+        return Puzzle.from_stored(self[k])
+
+    def load_many(self, ks, enrich=False):
+        """
+        Load several puzzles in one call.
+
+        Args:
+        ks (list): The puzzle indices.
+        enrich (bool): Whether to build the enriched boards now, with one batched
+        enrichment per grid shape instead of one per puzzle.
+
+        Returns:
+        list: The Puzzle objects, in the order of ks.
+        """
+        puzzles = [self.load(k) for k in ks]
+        if enrich:
+            shapes = {}
+            for puzzle in puzzles:
+                shapes.setdefault((puzzle.rows, puzzle.cols), []).append(puzzle)
+            for (rows, cols), group in shapes.items():
+                topology = get_hex_topology(rows, cols)
+                base = np.stack([puzzle.planes for puzzle in group])
+                levels = neighbor_planes(topology.adjacency, base, levels=3)
+                planes = np.concatenate([base] + levels, axis=1)
+                for puzzle, board_planes in zip(group, planes):
+                    puzzle.board = BitBoard.from_planes(
+                        topology.nodes,
+                        get_board_attributes(3),
+                        board_planes,
+                        topology.edges,
+                    )
+        return puzzles
+
+    def append_record(self, record):
+        """
+        Append a packed record unless an identical puzzle is already stored.
+
+        Args:
+        record (bytes): A record made by pack_puzzle.
+
+        Returns:
+        tuple: (unique code, True if the record was appended).
+        """
+        code = puzzle_code(record)
+        if code in self:
+            return code, False
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.data_path, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(record)
+        entry = np.zeros(1, dtype=INDEX_ENTRY)
+        entry["offset"] = offset
+        entry["length"] = len(record)
+        entry["code"] = np.frombuffer(bytes.fromhex(code), dtype=np.uint8)
+        with open(self.index_path, "ab") as f:
+            f.write(entry.tobytes())
+        # The store has a single writer, so the new entry is the last one
+        self._codes.add(code)
+        self._n_codes += 1
+        return code, True
+
+    def append_game_map(self, board, hints, rows, cols):
+        """
+        Pack and append a game map with its hints.
+
+        Returns:
+        tuple: (unique code, True if the puzzle was appended).
+        """
+        return self.append_record(pack_game_map(board, hints, rows, cols))
+
+
+def load_json_puzzle(graph_hash, directory="/opt/container/output"):
+    """
+    Load a puzzle stored as a JSON file (see serialize_graph) without building a graph.
+
+    Node attributes are read straight into bitboard masks; the networkx view is only built
+    when Puzzle.graph is accessed.
+
+    Args:
+    graph_hash (str): The file name of the puzzle in directory.
+    directory (str): The directory holding the JSON files.
+
+    Returns:
+    Puzzle: The puzzle, with its enriched board already available.
+
+    Raises:
+    ValueError: If the file holds no nodes.
+    """
+    with open(os.path.join(directory, graph_hash), "r") as f:
+        graph_data = json.load(f)
+
+    # Node IDs are two letters, row then column
+    nodes = {
+        (ord(node[0]) - ord("A"), ord(node[1]) - ord("A")): attrs
+        for node, attrs in graph_data["nodes"].items()
+    }
+    if not nodes:
+        raise ValueError(f"{graph_hash} holds no nodes")
+    rows = max(row for row, _ in nodes) + 1
+    cols = max(col for _, col in nodes) + 1
+    topology = get_hex_topology(rows, cols)
+    masks = {}
+    for i, node in enumerate(topology.nodes):
+        for attr, value in nodes[node].items():
+            if value is True:
+                masks[attr] = masks.get(attr, 0) | (1 << i)
+            else:
+                masks.setdefault(attr, 0)
+    board = BitBoard(topology.nodes, masks, topology.edges)
+
+    # Old files may number players from 0, but the order is what matters
+    hints = graph_data.get("hints", {})
+    hints = [hints[key] for key in sorted(hints)]
+    fitting_nodes = count_tiles_fitting_hints(board, hints)[1] if hints else []
+    cryptid = fitting_nodes[0] if len(fitting_nodes) == 1 else None
+    return Puzzle(graph_hash, rows, cols, hints, cryptid, board=board)
+
+
+def import_json_puzzles(store, directory):
+    """
+    Copy puzzles stored as one JSON file each (see serialize_graph) into a puzzle store.
+
+    Files that are not valid puzzles, e.g. whose hints do not single out exactly one cell,
+    are skipped rather than stopping the import.
+
+    Args:
+    store (PuzzleStore): The destination store.
+    directory (str): The directory holding <unique_code>.json files.
+
+    Returns:
+    tuple: (number of puzzles appended, {skipped file name: reason}).
+    """
+    appended = 0
+    skipped = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            puzzle = load_json_puzzle(name, directory)
+            if len(puzzle.hints) != 3:
+                raise ValueError(f"{len(puzzle.hints)} hints instead of 3")
+            _, added = store.append_game_map(
+                puzzle.board, puzzle.hints, puzzle.rows, puzzle.cols
+            )
+        except ValueError as error:
+            skipped[name] = str(error)
+            continue
+        appended += added
+    return appended, skipped
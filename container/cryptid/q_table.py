@@ -0,0 +1,641 @@
+import os
+
+import numpy as np
+
+from cryptid.interning import (
+    HINTS,
+    SESSION,
+    Interner,
+    intern_hint,
+    intern_key,
+    intern_keys,
+    key_values,
+    session_generation,
+)
+
+EMPTY = np.uint64(2**64 - 1)
+MASK64 = 2**64 - 1
+# Fibonacci hashing constant, 2**64 divided by the golden ratio
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+# Bit widths of the interned ids packed into one 64-bit key
+STATE_BITS = 32
+HINT_BITS = 12
+MOVE_BITS = 20
+
+# Translation of a session id that was not looked up yet, see QTable.local_ids
+UNTRANSLATED = -2
+
+LOG_ENTRY = np.dtype([("key", "<u8"), ("value", "<f8")])
+
+
+def broadcast_ids(states, hints, moves):
+    """Return ids of key parts, scalars or arrays, as int64 arrays of one common length."""
+    return np.broadcast_arrays(
+        *(
+            np.atleast_1d(np.asarray(ids, dtype=np.int64))
+            for ids in (states, hints, moves)
+        )
+    )
+
+
+class HashTable:
+    """
+    Open-addressing hash table from uint64 keys to float64 values, stored in two arrays.
+
+    Uses linear probing with Fibonacci hashing and doubles its capacity at half load. The
+    all-ones key marks empty slots and cannot be stored.
+    """
+
+    def __init__(self, capacity=1024, keys=None, values=None):
+        if keys is None:
+            capacity = 1 << max(capacity - 1, 1).bit_length()
+            keys = np.full(capacity, EMPTY, dtype=np.uint64)
+            values = np.zeros(capacity, dtype=np.float64)
+        self.keys = keys
+        self.values = values
+        self.bits = len(keys).bit_length() - 1
+        self.size = int(np.count_nonzero(keys != EMPTY))
+
+    def slot(self, key):
+        """Return the slot holding key, or the empty slot where it would go."""
+        mask = len(self.keys) - 1
+        i = ((key * HASH_MULTIPLIER) & MASK64) >> (64 - self.bits)
+        keys = self.keys
+        while True:
+            found = int(keys[i])
+            if found == key or found == MASK64:
+                return i
+            i = (i + 1) & mask
+
+    def get(self, key, default=None):
+        i = self.slot(key)
+        if self.keys[i] == EMPTY:
+            return default
+        return float(self.values[i])
+
+    def put(self, key, value):
+        i = self.slot(key)
+        if self.keys[i] == EMPTY:
+            if 2 * (self.size + 1) > len(self.keys):
+                self.resize(2 * len(self.keys))
+                i = self.slot(key)
+            self.keys[i] = key
+            self.size += 1
+        self.values[i] = value
+
+    def resize(self, capacity):
+        occupied = self.keys != EMPTY
+        keys, values = self.keys[occupied], self.values[occupied]
+        self.keys = np.full(capacity, EMPTY, dtype=np.uint64)
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.bits = capacity.bit_length() - 1
+        for key, value in zip(keys.tolist(), values.tolist()):
+            i = self.slot(key)
+            self.keys[i] = key
+            self.values[i] = value
+
+    def get_many(self, keys, default=None):
+        """
+        Look up many keys at once, probing all of them in lockstep.
+
+        Args:
+        keys (numpy.ndarray): uint64 keys.
+        default (float): Value for missing keys.
+
+        Returns:
+        numpy.ndarray: float64 values.
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        result = np.full(
+            len(keys), np.nan if default is None else default, dtype=np.float64
+        )
+        mask = len(self.keys) - 1
+        # uint64 arithmetic wraps, like the & MASK64 of slot
+        slots = (keys * np.uint64(HASH_MULTIPLIER)) >> np.uint64(64 - self.bits)
+        slots = slots.astype(np.int64)
+        pending = np.arange(len(keys))
+        while len(pending):
+            found = self.keys[slots[pending]]
+            hit = found == keys[pending]
+            result[pending[hit]] = self.values[slots[pending[hit]]]
+            pending = pending[~hit & (found != EMPTY)]
+            slots[pending] = (slots[pending] + 1) & mask
+        return result
+
+    def items(self):
+        """Return the stored keys and values as two arrays."""
+        occupied = self.keys != EMPTY
+        return self.keys[occupied], self.values[occupied]
+
+    def __len__(self):
+        return self.size
+
+
+class QTable:
+    """
+    Q-value store with the interface of the Q-matrix dict, keyed by (state, hint, move).
+
+    States, hints and moves are interned to integers and packed into one 64-bit key, and the
+    values live in an array-backed HashTable. When bound to a directory, the table is stored
+    as a base table (table.npy, an array of (key, value) records, memory-mapped
+    copy-on-write when opened) plus an append log of the same records. save() only appends
+    the entries changed since the last save, and the interned values added since then;
+    compact() folds the log into a new base table.
+
+    Besides the dict interface, the *_interned methods take keys as session ids (see
+    cryptid.interning), which they translate to the persisted ids of the table through
+    arrays, so no key tuples are built or hashed.
+    """
+
+    def __init__(self, directory=None, capacity=1024):
+        """
+        Open a Q-table, loading whatever is stored in directory.
+
+        Args:
+        directory (str or None): Storage directory, None for an in-memory table.
+        capacity (int): Initial capacity of an empty table.
+        """
+        self.directory = directory
+        self.states = Interner()
+        self.hints = Interner()
+        self.moves = Interner()
+        # Session id to id of this table, see local_ids
+        self.reset_translations()
+        self.dirty = set()
+        self.table = HashTable(capacity)
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.load()
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def interners(self):
+        return {"states": self.states, "hints": self.hints, "moves": self.moves}
+
+    def load(self):
+        for name, interner in self.interners().items():
+            if os.path.exists(self.path(f"{name}.txt")):
+                interner.load(self.path(f"{name}.txt"))
+        # The log first: a compaction between the two reads then leaves a base table that
+        # already holds the log entries, rather than an old base table and no log
+        data = b""
+        if os.path.exists(self.path("log.bin")):
+            with open(self.path("log.bin"), "rb") as f:
+                data = f.read()
+        if os.path.exists(self.path("table.npy")):
+            table = np.load(self.path("table.npy"), mmap_mode="c")
+            self.table = HashTable(keys=table["key"], values=table["value"])
+        elif os.path.exists(self.path("keys.npy")):
+            # Base arrays of earlier versions, replaced by table.npy on the next compaction
+            self.table = HashTable(
+                keys=np.load(self.path("keys.npy"), mmap_mode="c"),
+                values=np.load(self.path("values.npy"), mmap_mode="c"),
+            )
+        # Ignore a trailing record that a writer is still appending
+        count = len(data) // LOG_ENTRY.itemsize
+        log = np.frombuffer(data, dtype=LOG_ENTRY, count=count)
+        for key, value in zip(log["key"].tolist(), log["value"].tolist()):
+            self.table.put(key, value)
+
+    def local_ids(self, name, ids, add=False):
+        """
+        Translate session ids (see cryptid.interning) to the ids of this table.
+
+        Only the requested ids are translated, each looked up in the interner of this table
+        once and remembered, so the cost does not grow with the size of the session.
+
+        Args:
+        name (str): "states", "hints" or "moves".
+        ids (numpy.ndarray): int64 session ids.
+        add (bool): Intern unknown values instead of returning -1 for them.
+
+        Returns:
+        numpy.ndarray: int64 ids of this table, -1 for unknown values.
+        """
+        session, interner = SESSION[name], self.interners()[name]
+        if self.generation != session_generation():
+            # The session was cleared, its ids now stand for other values
+            self.reset_translations()
+        translation = self.translations[name]
+        if len(translation) < len(session):
+            grown = np.full(max(len(session), 2 * len(translation)), UNTRANSLATED)
+            grown[: len(translation)] = translation
+            translation = self.translations[name] = grown
+        local_ids = translation[ids]
+        pending = local_ids == UNTRANSLATED
+        if add:
+            pending |= local_ids < 0
+        if pending.any():
+            for i in np.unique(ids[pending]).tolist():
+                local = interner.id(session.value(i), add)
+                translation[i] = -1 if local is None else local
+            local_ids = translation[ids]
+        return local_ids
+
+    def reset_translations(self):
+        self.translations = {
+            name: np.full(0, UNTRANSLATED) for name in self.interners()
+        }
+        self.generation = session_generation()
+
+    def translate(self, states, hints, moves, add=False):
+        """Translate session ids of key parts, see local_ids, broadcasting them together."""
+        parts = broadcast_ids(states, hints, moves)
+        return [
+            self.local_ids(name, ids, add)
+            for name, ids in zip(("states", "hints", "moves"), parts)
+        ]
+
+    @staticmethod
+    def pack_ids(states, hints, moves):
+        """Pack arrays of ids of this table into 64-bit keys."""
+        # The last state id is left out, the all-ones key marks empty slots
+        if (
+            (states >= 2**STATE_BITS - 1).any()
+            or (hints >> HINT_BITS).any()
+            or (moves >> MOVE_BITS).any()
+        ):
+            raise ValueError("Too many interned values to pack the keys")
+        return (
+            (states.astype(np.uint64) << np.uint64(HINT_BITS + MOVE_BITS))
+            | (hints.astype(np.uint64) << np.uint64(MOVE_BITS))
+            | moves.astype(np.uint64)
+        )
+
+    def unpack_key(self, packed):
+        state_id = packed >> (HINT_BITS + MOVE_BITS)
+        hint_id = (packed >> MOVE_BITS) & ((1 << HINT_BITS) - 1)
+        move_id = packed & ((1 << MOVE_BITS) - 1)
+        return (
+            self.states.value(state_id),
+            self.hints.value(hint_id),
+            self.moves.value(move_id),
+        )
+
+    def get_interned(self, state, hint, move, default=None):
+        """Look up the key of session ids (state, hint, move)."""
+        states, hints, moves = self.translate(state, hint, move)
+        if states[0] < 0 or hints[0] < 0 or moves[0] < 0:
+            return default
+        return self.table.get(int(self.pack_ids(states, hints, moves)[0]), default)
+
+    def get_many_interned(self, states, hints, moves, default=None):
+        """
+        Look up many keys of session ids at once.
+
+        Args:
+        states, hints, moves (numpy.ndarray): The session ids of the key parts, broadcast
+        together, so e.g. a single hint id applies to every key.
+        default (float): Value for missing keys.
+
+        Returns:
+        numpy.ndarray: float64 values.
+        """
+        states, hints, moves = self.translate(states, hints, moves)
+        known = (states >= 0) & (hints >= 0) & (moves >= 0)
+        result = np.full(
+            len(known), np.nan if default is None else default, dtype=np.float64
+        )
+        packed = self.pack_ids(states[known], hints[known], moves[known])
+        result[known] = self.table.get_many(packed, default)
+        return result
+
+    def set_interned(self, state, hint, move, value):
+        packed = int(self.pack_ids(*self.translate(state, hint, move, add=True))[0])
+        self.table.put(packed, value)
+        self.dirty.add(packed)
+
+    def get(self, key, default=None):
+        return self.get_interned(*intern_key(key), default)
+
+    def get_many(self, keys, default=None):
+        """Look up a list of keys at once, returning a float64 array."""
+        return self.get_many_interned(*intern_keys(keys), default)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set_interned(*intern_key(key), value)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self.table)
+
+    def items(self):
+        keys, values = self.table.items()
+        for packed, value in zip(keys.tolist(), values.tolist()):
+            yield self.unpack_key(packed), value
+
+    def keys(self):
+        return (key for key, _ in self.items())
+
+    def update(self, mapping):
+        for key, value in mapping.items():
+            self[key] = value
+
+    def save(self, allow_compact=True):
+        """
+        Append the entries changed since the last save to the log.
+
+        Args:
+        allow_compact (bool): Compact once the log outgrows the table. Disable while other
+        processes may be reading the table, compaction replaces the base files.
+        """
+        if self.directory is None:
+            raise ValueError("QTable has no directory to save to")
+        # Interned values first, so every logged key can be resolved
+        for name, interner in self.interners().items():
+            interner.append_new(self.path(f"{name}.txt"))
+        if self.dirty:
+            log = np.empty(len(self.dirty), dtype=LOG_ENTRY)
+            log["key"] = sorted(self.dirty)
+            log["value"] = [self.table.get(key) for key in log["key"].tolist()]
+            with open(self.path("log.bin"), "ab") as f:
+                log.tofile(f)
+            self.dirty.clear()
+        if allow_compact and self.log_size() > len(self.table):
+            self.compact()
+
+    def log_size(self):
+        if not os.path.exists(self.path("log.bin")):
+            return 0
+        return os.path.getsize(self.path("log.bin")) // LOG_ENTRY.itemsize
+
+    def compact(self):
+        """
+        Rewrite the base table with the current entries and empty the log.
+
+        Keys and values are written to one file that is swapped in with a single rename, so
+        readers see either the old or the new base table, never a mix of both. Replaying
+        the log over the new base table is idempotent, so removing the log last is safe.
+        """
+        # Log the unsaved entries first, so the log never holds older values than the table
+        self.save(allow_compact=False)
+        table = np.empty(len(self.table.keys), dtype=LOG_ENTRY)
+        table["key"] = self.table.keys
+        table["value"] = self.table.values
+        np.save(self.path("table.tmp.npy"), table)
+        os.replace(self.path("table.tmp.npy"), self.path("table.npy"))
+        for name in ("log.bin", "keys.npy", "values.npy"):
+            if os.path.exists(self.path(name)):
+                os.remove(self.path(name))
+        self.table = HashTable(keys=table["key"], values=table["value"])
+
+
+def shard_name(hint):
+    """Return the directory name of the shard of a sorted hint tuple."""
+    return "+".join(hint)
+
+
+class ShardedQTable:
+    """
+    Q-table partitioned by hint, with the same dict interface as QTable.
+
+    Every Q key carries the sorted hint tuple of the player, so each hint gets its own
+    QTable in a subdirectory. Shards are opened lazily, on first access to one of their keys,
+    and save() only touches the shards that were opened. A game, which involves three hints,
+    therefore loads and writes three shards however large the whole table grows.
+    """
+
+    def __init__(self, directory=None, hints=()):
+        """
+        Open a sharded Q-table.
+
+        Args:
+        directory (str or None): Storage directory, None for an in-memory table.
+        hints (iterable): Hints whose shards are opened right away, e.g. those of a puzzle.
+        """
+        self.directory = directory
+        self.shards = {}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        for hint in hints:
+            self.shard(HINTS.value(intern_hint(hint)))
+
+    def shard(self, hint, create=True):
+        """
+        Return the shard of a sorted hint tuple, opening it if needed.
+
+        Args:
+        hint (tuple): The sorted hint tuple.
+        create (bool): Create the shard if it does not exist yet, else return None.
+
+        Returns:
+        QTable or None: The shard.
+        """
+        shard = self.shards.get(hint)
+        if shard is None:
+            path = None
+            if self.directory is not None:
+                path = os.path.join(self.directory, shard_name(hint))
+            if not create and (path is None or not os.path.isdir(path)):
+                return None
+            shard = self.shards[hint] = QTable(path)
+        return shard
+
+    def get_interned(self, state, hint, move, default=None):
+        shard = self.shard(HINTS.value(hint), create=False)
+        if shard is None:
+            return default
+        return shard.get_interned(state, hint, move, default)
+
+    def get_many_interned(self, states, hints, moves, default=None):
+        """Look up many keys of session ids at once, one bulk lookup per shard."""
+        states, hints, moves = broadcast_ids(states, hints, moves)
+        result = np.full(
+            len(states), np.nan if default is None else default, dtype=np.float64
+        )
+        for hint in np.unique(hints).tolist():
+            shard = self.shard(HINTS.value(hint), create=False)
+            if shard is not None:
+                rows = hints == hint
+                result[rows] = shard.get_many_interned(
+                    states[rows], hint, moves[rows], default
+                )
+        return result
+
+    def set_interned(self, state, hint, move, value):
+        self.shard(HINTS.value(hint)).set_interned(state, hint, move, value)
+
+    def get(self, key, default=None):
+        return self.get_interned(*intern_key(key), default)
+
+    def get_many(self, keys, default=None):
+        """Look up a list of keys at once, one bulk lookup per shard."""
+        return self.get_many_interned(*intern_keys(keys), default)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set_interned(*intern_key(key), value)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        """Return the number of entries in the opened shards."""
+        return sum(len(shard) for shard in self.shards.values())
+
+    def items(self):
+        """Iterate over the entries of the opened shards."""
+        for shard in self.shards.values():
+            yield from shard.items()
+
+    def keys(self):
+        return (key for key, _ in self.items())
+
+    def update(self, mapping):
+        for key, value in mapping.items():
+            self[key] = value
+
+    def save(self, allow_compact=True):
+        """Append the changes of every opened shard to its log, see QTable.save."""
+        for shard in self.shards.values():
+            shard.save(allow_compact)
+
+    def compact(self):
+        for shard in self.shards.values():
+            shard.compact()
+
+
+class QDelta:
+    """
+    Local changes on top of a read-only Q snapshot, with the dict interface of the Q-matrix.
+
+    Reads fall through to the snapshot, writes stay local. deltas() returns every change as
+    an increment over the snapshot value at the time of the first write, so the changes of
+    several workers playing against the same snapshot can all be added to the master table
+    (see merge_deltas).
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        # Keyed by session id triples, see cryptid.interning
+        self.values = {}
+        self.base = {}
+
+    def get_interned(self, state, hint, move, default=None):
+        value = self.values.get((state, hint, move))
+        if value is None:
+            return get_interned(self.snapshot, state, hint, move, default)
+        return value
+
+    def get_many_interned(self, states, hints, moves, default=None):
+        """Look up many keys of session ids at once, local changes taking precedence."""
+        states, hints, moves = broadcast_ids(states, hints, moves)
+        result = get_many_interned(self.snapshot, states, hints, moves, default)
+        if self.values:
+            keys = zip(states.tolist(), hints.tolist(), moves.tolist())
+            for i, key in enumerate(keys):
+                if key in self.values:
+                    result[i] = self.values[key]
+        return result
+
+    def set_interned(self, state, hint, move, value):
+        key = (state, hint, move)
+        if key not in self.base:
+            self.base[key] = get_interned(self.snapshot, state, hint, move, 0)
+        self.values[key] = value
+
+    def get(self, key, default=None):
+        return self.get_interned(*intern_key(key), default)
+
+    def get_many(self, keys, default=None):
+        """Look up a list of keys at once, local changes taking precedence."""
+        return self.get_many_interned(*intern_keys(keys), default)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set_interned(*intern_key(key), value)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def deltas(self):
+        """
+        Return the change of every written key, missing snapshot values counting as 0.
+
+        The keys are translated back to (state, hint, move) values, session ids being
+        meaningless in the process the deltas are merged in.
+        """
+        return {
+            key_values(*key): value - self.base[key]
+            for key, value in self.values.items()
+        }
+
+
+def get_interned(q_matrix, state, hint, move, default=None):
+    """
+    Look up a key of session ids (see cryptid.interning) in a Q-matrix.
+
+    Args:
+    q_matrix (dict-like): A QTable, ShardedQTable, QDelta or plain dict. A plain dict is
+    keyed by values, so the ids are translated back.
+    state, hint, move (int): The session ids of the key parts.
+    default (float): Value for a missing key.
+
+    Returns:
+    float: The value.
+    """
+    if hasattr(q_matrix, "get_interned"):
+        return q_matrix.get_interned(state, hint, move, default)
+    return q_matrix.get(key_values(state, hint, move), default)
+
+
+def get_many_interned(q_matrix, states, hints, moves, default=None):
+    """
+    Look up many keys of session ids in a Q-matrix at once, see get_interned.
+
+    Args:
+    q_matrix (dict-like): A QTable, ShardedQTable, QDelta or plain dict.
+    states, hints, moves (numpy.ndarray): The session ids of the key parts, broadcast
+    together.
+    default (float): Value for missing keys.
+
+    Returns:
+    numpy.ndarray: float64 values.
+    """
+    if hasattr(q_matrix, "get_many_interned"):
+        return q_matrix.get_many_interned(states, hints, moves, default)
+    states, hints, moves = broadcast_ids(states, hints, moves)
+    keys = zip(states.tolist(), hints.tolist(), moves.tolist())
+    return np.array(
+        [q_matrix.get(key_values(*key), default) for key in keys], dtype=np.float64
+    )
+
+
+def set_interned(q_matrix, state, hint, move, value):
+    """Set the value of a key of session ids in a Q-matrix, see get_interned."""
+    if hasattr(q_matrix, "set_interned"):
+        q_matrix.set_interned(state, hint, move, value)
+    else:
+        q_matrix[key_values(state, hint, move)] = value
+
+
+def merge_deltas(q_table, deltas):
+    """
+    Add Q-value increments to a Q-table, missing values counting as 0.
+
+    Args:
+    q_table (ShardedQTable, QTable or dict): The master table.
+    deltas (dict): Increment per key, see QDelta.deltas.
+    """
+    for key, delta in deltas.items():
+        q_table[key] = q_table.get(key, 0) + delta
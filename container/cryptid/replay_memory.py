@@ -0,0 +1,131 @@
+import numpy as np
+
+from cryptid.interning import (
+    HINTS,
+    MOVES,
+    STATES,
+    intern_hint,
+    intern_move,
+    intern_state,
+)
+
+
+class ReplayMemory:
+    """
+    Fixed-capacity replay memory of (state, move, hint) transitions.
+
+    States, moves and hints are stored as their session ids (see cryptid.interning), hints
+    as sorted tuples, and every transition is one row of preallocated NumPy arrays used as a
+    ring buffer: inserting is O(1) and overwrites the oldest transition once the memory is
+    full. Each transition also records its game, so the
+    transitions of a game can be replayed in order, and a priority for prioritized sampling.
+    """
+
+    def __init__(self, capacity=100_000):
+        """
+        Args:
+        capacity (int): Maximum number of transitions kept.
+        """
+        self.capacity = capacity
+        self.state_ids = np.zeros(capacity, dtype=np.int64)
+        self.move_ids = np.zeros(capacity, dtype=np.int32)
+        self.hint_ids = np.zeros(capacity, dtype=np.int32)
+        self.games = np.zeros(capacity, dtype=np.int64)
+        self.sequence = np.zeros(capacity, dtype=np.int64)
+        self.priorities = np.zeros(capacity, dtype=np.float64)
+        self.max_priority = 1.0
+        self.size = 0
+        self.inserted = 0
+        self.n_games = 0
+
+    def __len__(self):
+        return self.size
+
+    def new_game(self):
+        """Return the id to record the transitions of a new game with."""
+        self.n_games += 1
+        return self.n_games - 1
+
+    def add(self, state, move, hint, game=0, priority=None):
+        """
+        Insert a transition, evicting the oldest one when the memory is full.
+
+        Args:
+        state (str): The state before the move.
+        move (tuple): The move, e.g. ("question", node).
+        hint (list or tuple): The hint of the player making the move, recorded sorted.
+        game (int): The game of the transition, see new_game.
+        priority (float or None): Sampling priority, None for the highest priority so far,
+        so new transitions are sampled at least once.
+
+        Returns:
+        int: The row of the transition.
+        """
+        i = self.inserted % self.capacity
+        self.state_ids[i] = intern_state(state)
+        self.move_ids[i] = intern_move(move)
+        self.hint_ids[i] = intern_hint(hint)
+        self.games[i] = game
+        self.sequence[i] = self.inserted
+        if priority is None:
+            priority = self.max_priority
+        self.priorities[i] = priority
+        self.max_priority = max(self.max_priority, priority)
+        self.inserted += 1
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def transitions(self, rows):
+        """Return the (state, move, hint) transitions stored in rows."""
+        return [
+            (
+                STATES.value(state_id),
+                MOVES.value(move_id),
+                HINTS.value(hint_id),
+            )
+            for state_id, move_id, hint_id in zip(
+                self.state_ids[rows].tolist(),
+                self.move_ids[rows].tolist(),
+                self.hint_ids[rows].tolist(),
+            )
+        ]
+
+    def episode(self, game):
+        """Return the transitions of a game still in memory, in the order they were added."""
+        rows = np.flatnonzero(self.games[: self.size] == game)
+        rows = rows[np.argsort(self.sequence[rows])]
+        return self.transitions(rows)
+
+    def sample(self, generator, batch_size, alpha=0.0, beta=0.4):
+        """
+        Sample a minibatch of rows.
+
+        With alpha > 0, rows are drawn with probability proportional to priority ** alpha,
+        and importance-sampling weights correct for the non-uniform sampling.
+
+        Args:
+        generator (numpy.random.Generator): The random generator.
+        batch_size (int): Number of rows, drawn with replacement.
+        alpha (float): Prioritization strength, 0 for uniform sampling.
+        beta (float): Importance-sampling correction strength.
+
+        Returns:
+        tuple: (rows, weights), the weights normalized to a maximum of 1.
+        """
+        if not self.size:
+            raise ValueError("Cannot sample from an empty replay memory")
+        if alpha == 0:
+            rows = generator.integers(0, self.size, batch_size)
+            return rows, np.ones(batch_size)
+
+        scaled = self.priorities[: self.size] ** alpha
+        probabilities = scaled / scaled.sum()
+        rows = generator.choice(self.size, batch_size, p=probabilities)
+        weights = (self.size * probabilities[rows]) ** -beta
+        return rows, weights / weights.max()
+
+    def update_priorities(self, rows, priorities):
+        """Set the priorities of sampled rows, e.g. to their absolute TD errors."""
+        priorities = np.asarray(priorities, dtype=np.float64)
+        self.priorities[rows] = priorities
+        self.max_priority = max(self.max_priority, float(priorities.max(initial=0)))
@@ -0,0 +1,359 @@
+import multiprocessing as mp
+
+import numpy as np
+
+from cryptid.batch_self_play import play_batch
+from cryptid.evaluation_pool import LocalEvaluator
+from cryptid.game_rules import (
+    compile_hint_masks,
+    find_available_cube_moves,
+    find_available_moves,
+    find_available_placements,
+    find_predicted_states,
+    hint_applies,
+    initialize_player_pieces,
+    place_player_piece,
+    policy,
+    policy_cube,
+    process_move_mapcode,
+    read_qmatrix,
+    select_top_cube_moves,
+    select_top_moves,
+    update_q_matrix,
+)
+from cryptid.interning import clear_session, intern_hint
+from cryptid.puzzle_store import PuzzleStore
+from cryptid.q_table import QDelta, ShardedQTable, merge_deltas
+from cryptid.replay_memory import ReplayMemory
+
+PLAYERS = ["player1", "player2", "player3"]
+
+
+def silent(*args, **kwargs):
+    pass
+
+
+def play_game(
+    generator,
+    game_map,
+    hints_players,
+    q_matrix,
+    evaluator,
+    log=print,
+    replay_memory=None,
+    rounds=20,
+):
+    """
+    Play one game of self-play on a game map with initialized player pieces.
+
+    The game ends when a wild guess is confirmed by both other players, when the player to
+    move has no legal move or cannot place the cube owed after a cube answer, or after
+    `rounds` rounds, the same rules as play_batch and CryptidEnv.
+
+    Args:
+    generator (numpy.random.Generator): The random generator.
+    game_map (networkx.Graph): The game map, pieces are placed on it.
+    hints_players (dict): The hint of every player.
+    q_matrix (dict-like): The Q-matrix the moves are chosen with, it is only read.
+    evaluator (EvaluationPool or LocalEvaluator): Evaluates the predicted states of moves.
+    log (callable): Progress output, e.g. print or silent.
+    replay_memory (ReplayMemory or None): Memory the transitions are recorded in, shared
+    across games; None for a memory of this game only.
+    rounds (int): Maximum number of rounds.
+
+    Returns:
+    tuple: (the (state, move, hint) transitions of the game, whether the game was won, the
+    player who moved last).
+    """
+    if replay_memory is None:
+        replay_memory = ReplayMemory(capacity=len(PLAYERS) * rounds)
+    game = replay_memory.new_game()
+    # Initial cube placement for each player
+    for _ in range(2):
+        for player in PLAYERS:
+            log(f"Finding available placements for {player}...")
+            placements = find_available_placements(game_map, hints_players[player])
+            if placements["cube"]:
+                log(f"Finding available cube moves for {player}...")
+
+                cube_moves = find_available_cube_moves(game_map, player, hints_players)
+                log(f"Selecting top cube moves for {player}...")
+
+                top_cube_moves = select_top_cube_moves(
+                    generator, q_matrix, cube_moves, hints_players[player]
+                )
+                log(f"Choosing cube location for {player}...")
+
+                cube_location = policy_cube(generator, top_cube_moves)[1]
+                log(f"Placing cube for {player}...")
+
+                place_player_piece(game_map, cube_location, player, False)
+                log(f"{player} placed initial cube at {cube_location}")
+            else:
+                log(f"No available cube placements for {player}")
+
+    game_won = game_over = False
+    for i in range(rounds):
+        for player in PLAYERS:
+            log(f"Round {i}, player {player}")
+
+            my_placements = find_available_placements(game_map, hints_players[player])
+            if not my_placements["disc"] and not my_placements["cube"]:
+                log(f"{player} has no available moves. Game ends.")
+                game_over = True
+                break
+
+            log(
+                f"""Available placements for {player}:
+    Cubes: {len(my_placements['cube'])} options
+    Discs: {len(my_placements['disc'])} options
+    Total: {len(my_placements['cube']) + len(my_placements['disc'])} options"""
+            )
+            log(f"Finding available moves for {player}...")
+            my_moves = find_available_moves(game_map, player, hints_players)
+            log(f"Predicting states for {len(my_moves)} possible moves...")
+            my_moves_with_predicted_states = find_predicted_states(
+                game_map, my_moves, player, my_placements, pool=evaluator
+            )
+
+            log(f"Selecting top moves based on Q-values...")
+            top_moves = select_top_moves(
+                generator,
+                q_matrix,
+                my_moves_with_predicted_states,
+                hints_players[player],
+            )
+            log(f"Choosing move from top {len(top_moves)} moves...")
+            selected_move = policy(generator, top_moves)
+
+            log(f"Selected move: {selected_move[:-1]}")
+            log(f"Possible resulting states: {selected_move[-1]}")
+
+            log("Storing current state, action, and player's hint in replay buffer...")
+            current_state = process_move_mapcode(game_map, player)
+            replay_memory.add(
+                current_state, selected_move[:2], hints_players[player], game
+            )
+
+            other_player_placed_cube = False
+            if selected_move[0] == "question":
+                node = selected_move[1]
+                questioned_player = selected_move[2]
+                questioned_hint = hints_players[questioned_player]
+                answer = hint_applies(game_map, node, questioned_hint)
+                log(
+                    f"Round {i}: {player} asked {questioned_player} about node {node}. Answer: {answer}"
+                )
+
+                piece_type = "disc" if answer else "cube"
+                place_player_piece(game_map, node, questioned_player, answer)
+                log(f"{questioned_player} placed a {piece_type} at node {node}")
+
+                other_player_placed_cube = not answer
+            else:
+                log(f"Round {i}: {player} is making a wild guess...")
+                node = selected_move[1]
+                place_player_piece(game_map, node, player, True)
+                log(f"{player} placed a disc at node {node} (wild guess)")
+
+                log("Checking other players' responses...")
+                start_index = PLAYERS.index(player)
+                all_discs = True
+                for j in range(1, 4):
+                    next_player = PLAYERS[(start_index + j) % 3]
+                    if hint_applies(game_map, node, hints_players[next_player]):
+                        place_player_piece(game_map, node, next_player, True)
+                        log(f"{next_player} placed a disc at node {node}")
+                    else:
+                        place_player_piece(game_map, node, next_player, False)
+                        log(f"{next_player} placed a cube at node {node}")
+                        all_discs = False
+                        other_player_placed_cube = True
+                        log("A cube was placed, stopping the wild guess process")
+                        break  # Stop checking players after a cube is placed
+                if all_discs:
+                    game_won = True
+                    break
+
+            if other_player_placed_cube:
+                cube_moves = find_available_cube_moves(game_map, player, hints_players)
+                if not cube_moves:
+                    log(f"{player} has no available cube moves. Game ends.")
+                    game_over = True
+                    break
+                top_cube_moves = select_top_cube_moves(
+                    generator, q_matrix, cube_moves, hints_players[player]
+                )
+                cube_move = policy_cube(generator, top_cube_moves)
+                cube_node = cube_move[1]
+                place_player_piece(game_map, cube_node, player, False)
+                log(f"{player} placed a cube at node {cube_node}")
+
+        if game_won:
+            log(f"Game won by {player}!")
+            break
+        if game_over:
+            # A stuck player ends the game, as in play_batch and CryptidEnv
+            break
+
+    if not game_won:
+        log("Game ended without a winner.")
+    return replay_memory.episode(game), game_won, player
+
+
+def learn_from_game(
+    q_matrix, replay_buffer, final_state, hints_players, winner, log=print
+):
+    """
+    Update the Q-matrix with the moves of every player of a finished game.
+
+    Args:
+    q_matrix (dict-like): The Q-matrix to update.
+    replay_buffer (list): The (state, move, hint) entries of the game.
+    final_state (str): The state at the end of the game.
+    hints_players (dict): The hint of every player.
+    winner (str or None): The winning player, None if nobody won.
+    log (callable): Progress output, e.g. print or silent.
+
+    Returns:
+    dict: The final reward of every player.
+    """
+    final_rewards = {}
+    for player in PLAYERS:
+        hint = intern_hint(hints_players[player])
+        player_moves = [move for move in replay_buffer if intern_hint(move[2]) == hint]
+        if not player_moves:
+            continue
+        player_won = player == winner
+        log(f"Final player: {player} ({'winner' if player_won else 'loser'})")
+        q_matrix, final_rewards[player] = update_q_matrix(
+            q_matrix, player_moves, final_state, player_won
+        )
+        log(f"Final reward for {player}: {final_rewards[player]}")
+    return final_rewards
+
+
+def self_play_worker(args):
+    """
+    Play games against a read-only snapshot of the Q-table and return the Q changes.
+
+    Args:
+    args (tuple): (seed_sequence, n_games, store_dir, qtable_dir, batched). With batched,
+    the games are played in lockstep by play_batch.
+
+    Returns:
+    tuple: (Q increments per key, see QDelta.deltas, games played, games won).
+    """
+    seed_sequence, n_games, store_dir, qtable_dir, batched = args
+    # Pool processes run many tasks, keep the session ids to those of this one
+    clear_session()
+    generator = np.random.default_rng(seed_sequence)
+    store = PuzzleStore(store_dir)
+
+    # The snapshot is whatever the learner published last, games only add local changes
+    q_delta = QDelta(ShardedQTable(qtable_dir))
+    if batched:
+        puzzles = store.load_many(
+            generator.integers(0, len(store), n_games).tolist(), enrich=True
+        )
+        results = play_batch(generator, puzzles, q_delta)
+        for puzzle, (replay_buffer, final_state, winner) in zip(puzzles, results):
+            learn_from_game(
+                q_delta,
+                replay_buffer,
+                final_state,
+                puzzle.hints_players,
+                winner,
+                log=silent,
+            )
+        return (
+            q_delta.deltas(),
+            n_games,
+            sum(winner is not None for *_, winner in results),
+        )
+
+    games_won = 0
+    for _ in range(n_games):
+        puzzle = store.load(generator.integers(0, len(store)))
+        game_map = puzzle.graph
+        hints_players = puzzle.hints_players
+        compile_hint_masks(game_map)
+        initialize_player_pieces(game_map)
+
+        replay_buffer, game_won, final_player = play_game(
+            generator,
+            game_map,
+            hints_players,
+            q_delta,
+            LocalEvaluator(game_map),
+            log=silent,
+        )
+        winner = final_player if game_won else None
+        final_state = process_move_mapcode(game_map, final_player)
+        learn_from_game(
+            q_delta, replay_buffer, final_state, hints_players, winner, log=silent
+        )
+        games_won += game_won
+    return q_delta.deltas(), n_games, games_won
+
+
+def train_self_play(
+    seed,
+    n_games,
+    merge_interval=4,
+    store_dir="/opt/container/output/puzzles",
+    qtable_dir="/opt/container/output/qtable",
+    processes=None,
+    batched=False,
+    legacy_path=None,
+):
+    """
+    Train the Q-table with many games of self-play in parallel.
+
+    Workers each play merge_interval games against the last published Q-table and send
+    back their Q changes as increments. This process is the only writer: it adds every
+    worker's increments to the master table and publishes it by appending the changes to
+    the shard logs, so no update is lost and workers never race on the files.
+
+    Args:
+    seed (int or None): Root seed of the run.
+    n_games (int): Total number of games.
+    merge_interval (int): Games a worker plays between merges.
+    store_dir (str): Directory of the PuzzleStore the puzzles are drawn from.
+    qtable_dir (str): The Q-table directory.
+    processes (int or None): Pool size, None for one process per CPU.
+    batched (bool): Play the games of a worker in lockstep with play_batch.
+    legacy_path (str or None): A pickled Q-matrix to migrate into a new qtable_dir, see
+    read_qmatrix; None to start from an empty table.
+
+    Returns:
+    tuple: (number of games played, number of games won).
+    """
+    if not len(PuzzleStore(store_dir)):
+        raise ValueError(f"No puzzles in {store_dir}, farm some first")
+    q_table = read_qmatrix(qtable_dir, legacy_path)
+
+    n_tasks = -(-n_games // merge_interval)
+    seed_sequences = np.random.SeedSequence(seed).spawn(n_tasks)
+    tasks = [
+        (
+            ss,
+            min(merge_interval, n_games - k * merge_interval),
+            store_dir,
+            qtable_dir,
+            batched,
+        )
+        for k, ss in enumerate(seed_sequences)
+    ]
+
+    games_played = games_won = 0
+    with mp.Pool(processes) as pool:
+        for deltas, played, won in pool.imap_unordered(self_play_worker, tasks):
+            merge_deltas(q_table, deltas)
+            # Workers may be reading the shards, so no compaction until the pool is done
+            q_table.save(allow_compact=False)
+            games_played += played
+            games_won += won
+            print(f"Played {games_played} games, {games_won} won")
+    q_table.save()
+    return games_played, games_won
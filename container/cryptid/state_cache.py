@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+
+class StateCache:
+    """
+    Bounded least-recently-used cache for hypothetical-state evaluations.
+
+    Keys are canonical piece occupancies (see GameState.cube_key), values are whatever the
+    evaluation produced, e.g. the possible hint counts of every player. When the cache is
+    full the least recently used entry is evicted. Hits and misses are counted so the hit
+    rate can be reported.
+    """
+
+    def __init__(self, maxsize=100_000):
+        """
+        Args:
+        maxsize (int): Maximum number of entries, 0 disables caching.
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value of key, or None, updating the hit/miss counters."""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full."""
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
@@ -0,0 +1,118 @@
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+
+from cryptid.bitboard import BitBoard
+from cryptid.board import get_base_attributes
+
+PLAYERS = ("player1", "player2", "player3")
+PIECES = ("cube", "disc")
+# Fixed, so the keys and therefore the hashes are the same in every process and run
+ZOBRIST_SEED = 0x5EED_C2F7
+
+
+@lru_cache(maxsize=None)
+def piece_keys(n_cells):
+    """
+    Return the random 64-bit key of every (cell, player, piece) of a board.
+
+    Args:
+    n_cells (int): Number of cells of the board.
+
+    Returns:
+    numpy.ndarray: uint64 array of shape (cells, players, pieces), read-only.
+    """
+    generator = np.random.default_rng(ZOBRIST_SEED)
+    keys = generator.integers(
+        0, 2**64, size=(n_cells, len(PLAYERS), len(PIECES)), dtype=np.uint64
+    )
+    keys.flags.writeable = False
+    return keys
+
+
+def board_key(board):
+    """
+    Return a 64-bit key of a board, ignoring the pieces on it.
+
+    The key digests the base attribute planes, the board before enrichment, with the cells
+    sorted, so a game map and the puzzle it was built from get the same key in every
+    engine. Computed once per game.
+
+    Args:
+    board (BitBoard): The board.
+
+    Returns:
+    int: The key.
+    """
+    order = sorted(range(len(board.cells)), key=board.cells.__getitem__)
+    planes = board.planes(get_base_attributes())[:, order]
+    digest = hashlib.sha256(repr([board.cells[i] for i in order]).encode())
+    digest.update(np.packbits(planes).tobytes())
+    return int(digest.hexdigest()[:16], 16)
+
+
+def state_code(board, pieces):
+    """Return the 128-bit state code of a board key and a piece hash, as hex."""
+    return f"{board:016x}{pieces:016x}"
+
+
+class ZobristHash:
+    """
+    Incremental hash of the pieces on a game map.
+
+    Every (cell, player, piece) has a fixed random 64-bit key, and the piece hash is the XOR
+    of the keys of the pieces on the board. Placing or removing a piece XORs its key in, so
+    the hash is kept up to date in O(1) per piece instead of serializing the whole map. The
+    state code prefixes it with the board key, to tell positions on different maps apart.
+    """
+
+    def __init__(self, cell_index, board=0):
+        """
+        Args:
+        cell_index (dict): The index of every node, as in BitBoard.index.
+        board (int): The board key, see board_key.
+        """
+        self.cell_index = cell_index
+        self.keys = piece_keys(len(cell_index)).tolist()
+        self.board = board
+        self.pieces = 0
+
+    @classmethod
+    def from_graph(cls, G, cell_index=None):
+        """
+        Hash a game map, including the pieces already on it.
+
+        Args:
+        G (networkx.Graph): The game map.
+        cell_index (dict or None): The index of every node, None for the order of G.nodes.
+
+        Returns:
+        ZobristHash: The hash.
+        """
+        board = BitBoard.from_graph(G)
+        zobrist = cls(
+            board.index if cell_index is None else cell_index, board_key(board)
+        )
+        for node, data in G.nodes(data=True):
+            for player in PLAYERS:
+                for piece in PIECES:
+                    if data.get(f"{piece}_{player}", False):
+                        zobrist.toggle(node, player, piece)
+        return zobrist
+
+    def toggle(self, node, player, piece):
+        """Add or remove a piece ("cube" or "disc") of player on node."""
+        key = self.keys[self.cell_index[node]][PLAYERS.index(player)]
+        self.pieces ^= key[PIECES.index(piece)]
+
+    def code(self):
+        return state_code(self.board, self.pieces)
+
+    def copy(self):
+        zobrist = ZobristHash.__new__(ZobristHash)
+        zobrist.cell_index = self.cell_index
+        zobrist.keys = self.keys
+        zobrist.board = self.board
+        zobrist.pieces = self.pieces
+        return zobrist
@@ -0,0 +1,25 @@
+import argparse
+
+from cryptid.farming import farm_puzzles
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Farm unique Cryptid puzzles in parallel"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--shards", type=int, default=64)
+    parser.add_argument("--boards-per-shard", type=int, default=100)
+    parser.add_argument("--puzzles-per-board", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--store", default="/opt/container/output/puzzles")
+    args = parser.parse_args()
+
+    written, duplicates = farm_puzzles(
+        args.seed,
+        args.shards,
+        args.boards_per_shard,
+        store_dir=args.store,
+        puzzles_per_board=args.puzzles_per_board,
+        processes=args.processes,
+    )
+    print(f"Farming done: {written} new puzzles, {duplicates} duplicates skipped")
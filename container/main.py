@@ -1,13 +1,15 @@
 import numpy as np
 
+from cryptid.bitboard import BitBoard
 from cryptid.board import generate_game_map
 from cryptid.game_rules import (
     count_tiles_fitting_hints,
     generate_hint_combinations,
+    sample_puzzle,
     verify_map_attributes,
 )
 from cryptid.plotting import plot_hexagonal_grid, plot_hexagonal_test
-from utils.graph_utils import generate_unique_code, serialize_graph
+from cryptid.puzzle_store import PuzzleStore
 
 if __name__ == "__main__":
     generator = np.random.default_rng()
@@ -51,21 +53,20 @@ if __name__ == "__main__":
         # Generate new game map
         game_map = generate_game_map(generator, 11, 8)
 
-        # Generate new hint combinations
-        hint_combinations = generate_hint_combinations(generator)
+        # Pick the cryptid cell first and draw hints consistent with it
+        puzzle = sample_puzzle(generator, BitBoard.from_graph(game_map))
 
-        # Count tiles fitting all hint combinations together
-        total_count, fitting_nodes = count_tiles_fitting_hints(
-            game_map, hint_combinations
-        )
-        print(f"Tiles fitting all hint combinations: {total_count}")
-        print(f"Nodes fitting all hint combinations: {fitting_nodes}")
+        total_count = 0
+        if puzzle is not None:
+            hint_combinations, cryptid_node = puzzle
+            total_count, fitting_nodes = 1, [cryptid_node]
+            print(f"Selected hint combinations: {hint_combinations}")
+            print(f"Node fitting all hint combinations: {cryptid_node}")
 
         if total_count == 1:
-            # Serialize the game map and generate a unique code
-
-            serialized_data = serialize_graph(game_map, hints=hint_combinations)
-            unique_code = generate_unique_code(serialized_data)
+            # Pack the game map and hints into the puzzle store
+            store = PuzzleStore("output/puzzles")
+            unique_code, _ = store.append_game_map(game_map, hint_combinations, 11, 8)
 
             plot_hexagonal_test(
                 game_map,
@@ -94,8 +95,4 @@ if __name__ == "__main__":
         prefix=f"output/real_{unique_code}",
     )
 
-    # Write the serialized data to a file
-    with open(f"output/{unique_code}.json", "w") as f:
-        f.write(serialized_data)
-
-    print(f"Game map serialized and saved with unique code: {unique_code}")
+    print(f"Game map stored with unique code: {unique_code}")
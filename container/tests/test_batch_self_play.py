@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from cryptid.batch_self_play import PLAYERS, BatchedGames, play_batch
+from cryptid.evaluation_pool import LocalEvaluator
+from cryptid.farming import farm_shard
+from cryptid.game_rules import (
+    HintTracker,
+    compile_hint_masks,
+    evaluate_move_states,
+    find_available_moves,
+    find_available_placements,
+    hint_applies,
+    initialize_player_pieces,
+    place_player_piece,
+    process_move_mapcode,
+)
+from cryptid.game_state import GameState
+from cryptid.puzzle_store import Puzzle, unpack_puzzle
+from cryptid.q_table import QTable
+from cryptid.self_play import play_game, silent
+
+
+@pytest.fixture
+def puzzles():
+    records = farm_shard((np.random.SeedSequence(4), 2, 11, 8, 2))
+    return [Puzzle.from_stored(unpack_puzzle(str(i), r)) for i, r in enumerate(records)]
+
+
+def test_batched_games_match_game_rules(puzzles):
+    generator = np.random.default_rng(seed=1)
+    games = BatchedGames(puzzles)
+    maps = []
+    for puzzle in puzzles:
+        game_map = puzzle.board.to_graph()
+        initialize_player_pieces(game_map)
+        maps.append(game_map)
+
+    # Same random pieces on the arrays and on the game maps
+    for _ in range(8):
+        all_games = np.arange(len(puzzles))
+        p = int(generator.integers(0, 3))
+        cells = generator.integers(0, len(games.cells), len(puzzles))
+        is_disc = generator.random(len(puzzles)) < 0.5
+        games.place(all_games, p, cells, is_disc)
+        for game_map, cell, disc in zip(maps, cells, is_disc):
+            place_player_piece(game_map, games.cells[cell], PLAYERS[p], bool(disc))
+
+    for b, (puzzle, game_map) in enumerate(zip(puzzles, maps)):
+        hints_players = puzzle.hints_players
+        for p, player in enumerate(PLAYERS):
+            node = games.cells[5]
+            assert games.fits[b, p, 5] == hint_applies(
+                game_map, node, hints_players[player]
+            )
+        player = "player2"
+        my_placements = find_available_placements(game_map, hints_players[player])
+        cube_cells, disc_cells = games.placements(1)
+        assert [games.cells[c] for c in np.flatnonzero(cube_cells[b])] == (
+            my_placements["cube"]
+        )
+        assert [games.cells[c] for c in np.flatnonzero(disc_cells[b])] == (
+            my_placements["disc"]
+        )
+
+        state = GameState.from_graph(game_map, HintTracker.from_graph(game_map))
+        expected = [
+            evaluate_move_states(state, move, player, my_placements)
+            for move in find_available_moves(game_map, player, hints_players)
+        ]
+        assert games.predicted_states(b, 1, cube_cells[b]) == expected
+        assert games.state_key(b) == process_move_mapcode(game_map, player)
+
+
+def test_play_batch_finishes_every_game(puzzles):
+    results = play_batch(np.random.default_rng(seed=2), puzzles, QTable())
+    assert len(results) == len(puzzles)
+    for (replay_buffer, final_state, winner), puzzle in zip(results, puzzles):
+        assert replay_buffer
+        assert final_state[:16] == BatchedGames([puzzle]).state_key(0)[:16]
+        assert winner in PLAYERS + [None]
+        for state, move, hint in replay_buffer:
+            assert move[0] in ("question", "wild_guess")
+            assert hint in [tuple(sorted(h)) for h in puzzle.hints_players.values()]
+
+
+def test_engines_share_state_keys(puzzles):
+    puzzle = puzzles[0]
+    game_map = puzzle.board.to_graph()
+    compile_hint_masks(game_map)
+    initialize_player_pieces(game_map)
+    replay_buffer, _, final_player = play_game(
+        np.random.default_rng(seed=1),
+        game_map,
+        puzzle.hints_players,
+        {},
+        LocalEvaluator(game_map),
+        log=silent,
+    )
+    final_state = process_move_mapcode(game_map, final_player)
+
+    # The same pieces on the arrays give the same full key
+    games = BatchedGames([puzzle])
+    for cell, node in enumerate(games.cells):
+        for p, player in enumerate(PLAYERS):
+            for is_disc, piece in ((False, "cube"), (True, "disc")):
+                if game_map.nodes[node][f"{piece}_{player}"]:
+                    games.place(np.array([0]), p, np.array([cell]), is_disc)
+    assert games.state_key(0) == final_state
+
+    # Both engines key the states of this puzzle on the same board
+    ((batch_buffer, _, _),) = play_batch(np.random.default_rng(seed=1), [puzzle], {})
+    boards = {state[:16] for state, _, _ in replay_buffer + batch_buffer}
+    assert boards == {final_state[:16]}
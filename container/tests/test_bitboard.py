@@ -0,0 +1,70 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from cryptid.bitboard import BitBoard, mask_to_plane, plane_to_mask, popcount
+from cryptid.board import generate_game_map
+from cryptid.game_rules import count_tiles_fitting_hints, hint_applies
+from utils.graph_utils import create_graph
+
+
+@pytest.fixture
+def game_map():
+    return generate_game_map(np.random.default_rng(seed=42), 11, 8)
+
+
+def test_mask_plane_round_trip():
+    plane = np.zeros(88, dtype=bool)
+    plane[[0, 5, 63, 64, 87]] = True
+    mask = plane_to_mask(plane)
+    assert popcount(mask) == 5
+    assert mask >> 87 & 1
+    assert np.array_equal(mask_to_plane(mask, 88), plane)
+
+
+def test_from_graph(game_map):
+    board = BitBoard.from_graph(game_map)
+    assert len(board) == 88
+    for node, attrs in game_map.nodes(data=True):
+        for attr, value in attrs.items():
+            assert board.has(node, attr) == value
+
+
+def test_to_graph(game_map):
+    G = BitBoard.from_graph(game_map).to_graph()
+    assert isinstance(G, nx.Graph)
+    assert set(G.edges()) == set(game_map.edges())
+    for node, attrs in game_map.nodes(data=True):
+        assert all(G.nodes[node][attr] == value for attr, value in attrs.items())
+        assert not any(
+            value for attr, value in G.nodes[node].items() if attr not in attrs
+        )
+
+
+def test_set_and_cells_in():
+    board = BitBoard.from_graph(create_graph())
+    assert board.cells_in(board.mask("attr1")) == ["a", "c"]
+    board.set("b", "attr1")
+    board.set("c", "attr1", False)
+    assert board.cells_in(board.mask("attr1")) == ["a", "b"]
+    assert board.mask("unknown") == 0
+
+
+def test_planes(game_map):
+    board = BitBoard.from_graph(game_map)
+    planes = board.planes(["is_bear", "is_cougar"])
+    assert planes.shape == (2, 88)
+    rebuilt = BitBoard.from_planes(board.cells, ["is_bear", "is_cougar"], planes)
+    assert rebuilt.mask("is_bear") == board.mask("is_bear")
+
+
+def test_rules_on_bitboard(game_map):
+    board = BitBoard.from_graph(game_map)
+    hints = [("is_forest", "is_water"), ("is_bear", "neighbor_is_bear")]
+    assert count_tiles_fitting_hints(board, hints) == count_tiles_fitting_hints(
+        game_map, hints
+    )
+    for node in game_map.nodes:
+        assert hint_applies(board, node, hints[0]) == hint_applies(
+            game_map, node, hints[0]
+        )
@@ -8,13 +8,17 @@ from cryptid.board import (
     find_empty_location,
     generate_all_structures,
     generate_game_map,
+    generate_game_maps,
     generate_structure_color_combinations,
     get_all_animals,
+    get_base_attributes,
     get_terrain_types,
     select_random_structures,
     try_location,
+    unstack_game_map,
 )
-from utils.graph_utils import create_graph
+from utils.graph_generate_landscape import get_hex_topology
+from utils.graph_utils import create_graph, enrich_node_attributes, serialize_graph
 
 
 def test_generate_structure_color_combinations():
@@ -88,6 +92,51 @@ def test_generate_game_map():
     assert any(G.nodes[node].get("is_cougar", False) for node in G.nodes)
 
 
+def test_generate_game_map_is_reproducible():
+    first = generate_game_map(np.random.default_rng(seed=3), 11, 8)
+    second = generate_game_map(np.random.default_rng(seed=3), 11, 8)
+    assert serialize_graph(first) == serialize_graph(second)
+
+
+def test_generate_game_maps():
+    generator = np.random.default_rng(seed=42)
+    n, rows, cols = 50, 11, 8
+    attributes, planes = generate_game_maps(generator, n, rows, cols)
+    index = {attr: k for k, attr in enumerate(attributes)}
+
+    assert planes.shape == (n, len(attributes), rows * cols)
+    terrain = [index[f"is_{terrain}"] for terrain in get_terrain_types()]
+    assert (planes[:, terrain].sum(axis=1) == 1).all()
+
+    structures = [index[s] for s in generate_structure_color_combinations()]
+    structure_counts = planes[:, structures].sum(axis=(1, 2))
+    assert ((structure_counts >= 4) & (structure_counts <= 6)).all()
+    # Structures never share a cell
+    assert (planes[:, structures].sum(axis=1) <= 1).all()
+
+    topology = get_hex_topology(rows, cols)
+    G = nx.Graph(topology.edges)
+    for board in planes[:5]:
+        for animal in get_all_animals():
+            area = [
+                topology.nodes[i] for i in np.flatnonzero(board[index[f"is_{animal}"]])
+            ]
+            assert 3 <= len(area) <= 5
+            assert nx.number_connected_components(G.subgraph(area)) <= 2
+
+
+def test_generate_game_maps_enrichment():
+    generator = np.random.default_rng(seed=7)
+    attributes, planes = generate_game_maps(generator, 3, 11, 8)
+    base = get_base_attributes()
+    for board in planes:
+        G = unstack_game_map(base, board[: len(base)], 11, 8).to_graph()
+        enriched = enrich_node_attributes(G)
+        expected = unstack_game_map(attributes, board, 11, 8)
+        for node, attrs in enriched.nodes(data=True):
+            assert attrs == expected.node_attributes(node)
+
+
 # Run the tests
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from cryptid.env import CryptidEnv
+from cryptid.farming import farm_shard
+from cryptid.game_rules import (
+    find_available_moves,
+    find_available_placements,
+    hint_applies,
+    initialize_player_pieces,
+    place_player_piece,
+    process_move_mapcode,
+)
+from cryptid.puzzle_store import Puzzle, unpack_puzzle
+
+
+@pytest.fixture
+def puzzle():
+    records = farm_shard((np.random.SeedSequence(6), 1, 11, 8, 1))
+    return Puzzle.from_stored(unpack_puzzle("code", records[0]))
+
+
+def test_reset_starts_with_initial_cubes(puzzle):
+    env = CryptidEnv()
+    observation = env.reset(puzzle)
+    assert observation["phase"] == "cube"
+    assert observation["player"] == 0
+    assert observation["pieces"].shape == (2, 3, 88)
+    assert not observation["pieces"].any()
+    assert all(action[0] == "cube" for action in env.legal_actions())
+
+
+def test_env_follows_game_rules(puzzle):
+    generator = np.random.default_rng(seed=3)
+    env = CryptidEnv()
+    env.reset(puzzle)
+    game_map = puzzle.board.to_graph()
+    initialize_player_pieces(game_map)
+    hints_players = puzzle.hints_players
+
+    steps = 0
+    while not env.done:
+        player = f"player{env.player + 1}"
+        actions = env.legal_actions()
+        if env.phase == "cube":
+            cubes = find_available_placements(game_map, hints_players[player])["cube"]
+            assert actions == [("cube", node) for node in cubes]
+        else:
+            assert actions == find_available_moves(game_map, player, hints_players)
+
+        before = env.pieces.copy()
+        action = actions[generator.integers(0, len(actions))]
+        observation, reward, done, info = env.step(action)
+        steps += 1
+
+        # Mirror the new pieces on the game map
+        for piece, p, cell in zip(*np.nonzero(env.pieces & ~before)):
+            node = env.cells[cell]
+            place_player_piece(game_map, node, f"player{p + 1}", bool(piece))
+            if action[0] == "question" and piece:
+                assert hint_applies(game_map, node, hints_players[f"player{p + 1}"])
+        assert reward == (1.0 if info["winner"] else 0.0)
+
+    assert steps > 6
+    assert env.legal_actions() == []
+    assert env.state_key() == process_move_mapcode(game_map, "player1")
+
+
+def test_step_rejects_illegal_actions(puzzle):
+    env = CryptidEnv()
+    env.reset(puzzle)
+    with pytest.raises(ValueError):
+        env.step(("wild_guess", env.cells[0]))
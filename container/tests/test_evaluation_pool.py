@@ -0,0 +1,74 @@
+import numpy as np
+
+from cryptid.bitboard import BitBoard
+from cryptid.board import generate_game_map
+from cryptid.evaluation_pool import EvaluationPool
+from cryptid.game_rules import (
+    compile_hint_masks,
+    find_available_moves,
+    find_available_placements,
+    find_predicted_states,
+    generate_states,
+    initialize_player_pieces,
+    place_player_piece,
+    process_move_hintcode,
+    sample_puzzle,
+)
+
+
+def make_game():
+    generator = np.random.default_rng(seed=5)
+    game_map = generate_game_map(generator, 11, 8)
+    hints, _ = sample_puzzle(generator, BitBoard.from_graph(game_map))
+    hints_players = dict(zip(["player1", "player2", "player3"], hints))
+    compile_hint_masks(game_map)
+    initialize_player_pieces(game_map)
+    return generator, game_map, hints_players
+
+
+def expected_states(game_map, moves, player, my_placements):
+    """
+    Compute the {state code: multiplicity} of every move independently of the pool.
+
+    Every state of generate_states is placed on a copy of the game map without a hint
+    tracker, so the hint counts come from the attribute scan of hint_applies_everywhere.
+    """
+    result = []
+    for move in moves:
+        states = {}
+        for placements in generate_states(move, player, my_placements):
+            state_map = game_map.copy()
+            state_map.graph.clear()
+            for piece_player, node, is_disc in placements:
+                place_player_piece(state_map, node, piece_player, is_disc)
+            code = process_move_hintcode(state_map, placements[-1][0])
+            states[code] = states.get(code, 0) + 1
+        result.append(move + (states,))
+    return result
+
+
+def test_evaluation_pool_matches_independent_states():
+    generator, game_map, hints_players = make_game()
+    nodes = list(game_map.nodes)
+
+    with EvaluationPool(game_map, processes=2, chunksize=2) as pool:
+        for turn in range(2):
+            my_placements = find_available_placements(
+                game_map, hints_players["player1"]
+            )
+            moves = find_available_moves(game_map, "player1", hints_players)
+            # Two questions and a wild guess keep the attribute-scan reference fast
+            moves = [m for m in moves if m[0] == "question"][:2] + [
+                m for m in moves if m[0] == "wild_guess"
+            ][:1]
+            result = find_predicted_states(
+                game_map, moves, "player1", my_placements, pool=pool
+            )
+            assert result == expected_states(game_map, moves, "player1", my_placements)
+            # Workers must pick up cubes placed between turns
+            for player in ["player2", "player3"]:
+                node = nodes[generator.integers(0, len(nodes))]
+                place_player_piece(game_map, node, player, False)
+
+        # Question moves share their cube placements, so later states are cache hits
+        assert pool.cache_hits > 0
@@ -0,0 +1,31 @@
+import numpy as np
+
+from cryptid.farming import farm_puzzles, farm_shard
+from cryptid.game_rules import count_tiles_fitting_hints
+from cryptid.puzzle_store import PuzzleStore, expand_puzzle, unpack_puzzle
+
+
+def test_farm_shard_is_reproducible():
+    seed_sequence = np.random.SeedSequence(3).spawn(1)[0]
+    first = farm_shard((seed_sequence, 2, 11, 8, 3))
+    second = farm_shard((seed_sequence, 2, 11, 8, 3))
+    assert first == second
+    assert 0 < len(first) <= 6
+    for record in first:
+        puzzle = unpack_puzzle("code", record)
+        fitting = count_tiles_fitting_hints(expand_puzzle(puzzle), puzzle.hints)
+        assert fitting == (1, [puzzle.cryptid])
+
+
+def test_farm_puzzles_deduplicates(tmp_path):
+    store_dir = str(tmp_path)
+    written, duplicates = farm_puzzles(3, 2, 1, store_dir=store_dir, processes=2)
+    assert written > 0
+    assert duplicates == 0
+    assert len(PuzzleStore(store_dir)) == written
+
+    # Same seed, same puzzles: everything is a duplicate
+    written_again, duplicates = farm_puzzles(3, 2, 1, store_dir=store_dir, processes=2)
+    assert written_again == 0
+    assert duplicates == written
+    assert len(PuzzleStore(store_dir)) == written
@@ -2,21 +2,40 @@ import networkx as nx
 import numpy as np
 import pytest
 
+from cryptid.board import generate_game_map
 from cryptid.game_rules import (
+    HintTracker,
+    attached,
+    compile_hint_masks,
+    copy_game_map,
     count_possible_hints_for_all_players,
     count_possible_hints_for_player,
     count_tiles_fitting_hints,
+    evaluate_hint_masks,
+    evaluate_move_states,
     find_available_moves,
     find_available_placements,
+    find_unique_hint_triples,
     generate_all_hints,
     generate_states,
+    generate_weighted_states,
+    get_hint_catalog,
+    get_q_value,
     hint_applies,
     hint_applies_everywhere,
     initialize_player_pieces,
     place_player_piece,
     process_move_hintcode,
+    process_move_mapcode,
+    sample_puzzle,
+    score_moves,
+    select_top_cube_moves,
+    select_top_moves,
+    top_indices,
     update_q_matrix,
 )
+from cryptid.game_state import GameState
+from cryptid.q_table import QTable
 from utils.graph_utils import create_graph
 
 
@@ -31,6 +50,88 @@ def test_generate_all_hints():
     assert all(isinstance(category, list) for category in hints.values())
 
 
+@pytest.fixture(scope="module")
+def game_map():
+    return generate_game_map(np.random.default_rng(seed=42), 11, 8)
+
+
+def test_get_hint_catalog():
+    catalog = get_hint_catalog()
+    assert catalog is get_hint_catalog()
+    assert len(catalog) == sum(len(hints) for hints in generate_all_hints().values())
+    assert len(set(catalog)) == len(catalog)
+
+
+def test_evaluate_hint_masks(game_map):
+    catalog = get_hint_catalog()
+    masks = evaluate_hint_masks(game_map)
+    nodes = list(game_map.nodes)
+    for hint, mask in zip(catalog, masks):
+        assert all(
+            bool(mask >> i & 1) == hint_applies(game_map, node, hint)
+            for i, node in enumerate(nodes)
+        )
+
+
+def test_find_unique_hint_triples(game_map):
+    triples = find_unique_hint_triples(game_map)
+    assert len(triples) > 0
+    for hints, cell in triples:
+        assert len(set(hints)) == 3
+        assert count_tiles_fitting_hints(game_map, hints) == (1, [cell])
+
+
+def test_sample_puzzle(game_map):
+    generator = np.random.default_rng(seed=1)
+    for _ in range(10):
+        hints, cell = sample_puzzle(generator, game_map)
+        assert len(set(hints)) == 3
+        assert count_tiles_fitting_hints(game_map, hints) == (1, [cell])
+
+
+def test_sample_puzzle_for_cell(game_map):
+    generator = np.random.default_rng(seed=1)
+    solvable = {cell for _, cell in find_unique_hint_triples(game_map)}
+    for cell in game_map.nodes:
+        puzzle = sample_puzzle(generator, game_map, cell)
+        assert (puzzle is not None) == (cell in solvable)
+        if puzzle is not None:
+            assert count_tiles_fitting_hints(game_map, puzzle[0]) == (1, [cell])
+
+
+def test_compile_hint_masks():
+    game_map = generate_game_map(np.random.default_rng(seed=5), 11, 8)
+    compiled = generate_game_map(np.random.default_rng(seed=5), 11, 8)
+    masks = compile_hint_masks(compiled)
+    assert masks == evaluate_hint_masks(game_map)
+
+    initialize_player_pieces(game_map)
+    initialize_player_pieces(compiled)
+    for G in (game_map, compiled):
+        place_player_piece(G, (0, 0), "player1", False)
+        place_player_piece(G, (3, 4), "player2", True)
+
+    hints = {
+        "player1": ["is_forest", "is_swamp"],
+        "player2": ("is_bear", "neighbor_is_bear"),
+        "player3": ("blue", "neighbor_blue", "neighbor_neighbor_blue"),
+    }
+    for player, hint in hints.items():
+        assert all(
+            hint_applies(compiled, node, hint) == hint_applies(game_map, node, hint)
+            for node in game_map.nodes
+        )
+        assert find_available_placements(compiled, hint) == find_available_placements(
+            game_map, hint
+        )
+        assert find_available_moves(compiled, player, hints) == find_available_moves(
+            game_map, player, hints
+        )
+    assert count_tiles_fitting_hints(
+        compiled, list(hints.values())
+    ) == count_tiles_fitting_hints(game_map, list(hints.values()))
+
+
 def test_hint_applies(sample_graph):
     assert hint_applies(sample_graph, "a", ("attr1",))
     assert not hint_applies(sample_graph, "b", ("attr1",))
@@ -84,6 +185,103 @@ def test_generate_states():
     assert len(states) == 3  # 1 disc state + 2 cube states
 
 
+def test_generate_weighted_states():
+    move = ("question", "a", "player2")
+    my_placements = {"cube": ["b", "c", "d"], "disc": []}
+    states = generate_weighted_states(
+        move, "player1", my_placements, [("b", 2), ("d", 1)]
+    )
+    assert states == [
+        ([("player2", "a", True)], 1),
+        ([("player2", "a", False), ("player1", "b", False)], 2),
+        ([("player2", "a", False), ("player1", "d", False)], 1),
+    ]
+
+
+def test_evaluate_move_states_groups_equivalent_cubes():
+    game_map = generate_game_map(np.random.default_rng(seed=2), 11, 8)
+    initialize_player_pieces(game_map)
+    tracker = attached(game_map, "hint_tracker")
+    state = GameState.from_graph(game_map, tracker.copy())
+    my_placements = {"cube": list(game_map.nodes)[10:40], "disc": []}
+    cube_classes = tracker.group_cells("player1", my_placements["cube"])
+    assert len(cube_classes) < len(my_placements["cube"])
+    assert sum(weight for _, weight in cube_classes) == len(my_placements["cube"])
+
+    for move in [("question", (0, 0), "player2"), ("wild_guess", (0, 1))]:
+        grouped = evaluate_move_states(state, move, "player1", my_placements)
+        ungrouped = evaluate_move_states(
+            state,
+            move,
+            "player1",
+            my_placements,
+            cube_classes=[(node, 1) for node in my_placements["cube"]],
+        )
+        assert grouped == ungrouped
+        assert sum(grouped[-1].values()) == len(
+            generate_states(move, "player1", my_placements)
+        )
+
+
+def test_select_top_moves_weights_states():
+    q_matrix = {("s1", ("h",), ("question", "a")): 10}
+    moves = [
+        ("question", "a", "player2", {"s1": 1, "s2": 3}),
+        ("question", "b", "player2", {"s3": 1}),
+    ]
+    generator = np.random.default_rng(seed=0)
+    top = select_top_moves(generator, q_matrix, moves, ["h"], n=1, learning_rate=0)
+    # (10 + 3 * 1) / 4 beats 1
+    assert top == [moves[0]]
+
+
+def test_score_moves_matches_get_q_value():
+    generator = np.random.default_rng(seed=4)
+    hint = ["is_water", "is_desert"]
+    moves = [
+        ("question", (0, k), "player2", {f"s{j}": j + 1 for j in range(k % 4 + 1)})
+        for k in range(12)
+    ] + [("wild_guess", (1, 1), ["s0", "s2"])]
+    q_dict = {
+        (f"s{j}", ("is_desert", "is_water"), ("question", (0, k))): float(k * j)
+        for k in range(0, 12, 2)
+        for j in range(3)
+    }
+    q_table = QTable()
+    q_table.update(q_dict)
+
+    expected = []
+    for move in moves:
+        states = move[-1] if isinstance(move[-1], dict) else dict.fromkeys(move[-1], 1)
+        total = sum(
+            w * get_q_value(q_dict, move[:2], s, hint) for s, w in states.items()
+        )
+        expected.append(total / sum(states.values()))
+    assert np.allclose(score_moves(q_dict, moves, hint), expected)
+    assert np.allclose(score_moves(q_table, moves, hint), expected)
+
+
+def test_top_indices_breaks_only_ties_at_random():
+    generator = np.random.default_rng(seed=0)
+    scores = np.array([1.0, 5.0, 3.0, 3.0, 3.0, 0.0, 4.0])
+    for _ in range(10):
+        top = top_indices(generator, scores, 3)
+        assert list(top[:2]) == [1, 6]
+        assert top[2] in (2, 3, 4)
+    assert list(top_indices(generator, scores[:2], 3)) == [1, 0]
+
+
+def test_select_top_cube_moves_prefers_high_q():
+    q_matrix = {(None, ("blue",), ("cube", (0, 3))): 9.0}
+    cube_moves = [("cube", (0, i)) for i in range(5)]
+    generator = np.random.default_rng(seed=0)
+    top = select_top_cube_moves(
+        generator, q_matrix, cube_moves, ["blue"], n=2, learning_rate=0
+    )
+    assert top[0] == ("cube", (0, 3))
+    assert len(top) == 2
+
+
 def test_count_possible_hints_for_player(sample_graph):
     count = count_possible_hints_for_player(sample_graph, "player1")
     assert isinstance(count, int)
@@ -105,6 +303,58 @@ def test_process_move_hintcode(sample_graph):
     assert hintcode.startswith("player1-")
 
 
+def test_hint_tracker_matches_full_count():
+    generator = np.random.default_rng(seed=11)
+    game_map = generate_game_map(generator, 11, 8)
+    initialize_player_pieces(game_map)
+    nodes = list(game_map.nodes)
+
+    for _ in range(12):
+        node = nodes[generator.integers(0, len(nodes))]
+        player = f"player{generator.integers(1, 4)}"
+        place_player_piece(game_map, node, player, bool(generator.integers(0, 2)))
+
+        # A plain copy does not share the tracker, its counts come from the attributes
+        untracked = game_map.copy()
+        assert attached(untracked, "hint_tracker") is None
+        assert count_possible_hints_for_all_players(
+            game_map
+        ) == count_possible_hints_for_all_players(untracked)
+        rebuilt = HintTracker.from_graph(game_map)
+        assert rebuilt.possible == attached(game_map, "hint_tracker").possible
+
+
+def test_copy_game_map_copies_tracker():
+    game_map = generate_game_map(np.random.default_rng(seed=11), 11, 8)
+    initialize_player_pieces(game_map)
+    before = count_possible_hints_for_all_players(game_map)
+
+    game_map_copy = copy_game_map(game_map)
+    for node in list(game_map.nodes)[:20]:
+        place_player_piece(game_map_copy, node, "player2", False)
+    assert count_possible_hints_for_all_players(game_map) == before
+    assert count_possible_hints_for_all_players(game_map_copy)[1] < before[1]
+
+
+def test_plain_copy_leaves_tracked_state_alone():
+    game_map = generate_game_map(np.random.default_rng(seed=11), 11, 8)
+    initialize_player_pieces(game_map)
+    before = count_possible_hints_for_all_players(game_map)
+    code = process_move_mapcode(game_map, "player1")
+
+    game_map_copy = game_map.copy()
+    for node in list(game_map.nodes)[:20]:
+        place_player_piece(game_map_copy, node, "player2", False)
+    assert count_possible_hints_for_all_players(game_map) == before
+    assert process_move_mapcode(game_map, "player1") == code
+    assert HintTracker.from_graph(game_map).possible == (
+        attached(game_map, "hint_tracker").possible
+    )
+    # The copy is hashed and counted from its own attributes
+    assert count_possible_hints_for_all_players(game_map_copy)[1] < before[1]
+    assert process_move_mapcode(game_map_copy, "player1") != code
+
+
 def test_update_q_matrix():
     q_matrix = {}
     moves = [
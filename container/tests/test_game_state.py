@@ -0,0 +1,80 @@
+import numpy as np
+
+from cryptid.board import generate_game_map
+from cryptid.game_rules import (
+    HintTracker,
+    attached,
+    copy_game_map,
+    initialize_player_pieces,
+    place_player_piece,
+)
+from cryptid.game_state import GameState
+
+
+def make_state():
+    game_map = generate_game_map(np.random.default_rng(seed=3), 11, 8)
+    initialize_player_pieces(game_map)
+    nodes = list(game_map.nodes)
+    place_player_piece(game_map, nodes[0], "player1", False)
+    place_player_piece(game_map, nodes[1], "player2", True)
+    tracker = attached(game_map, "hint_tracker").copy()
+    return game_map, nodes, GameState.from_graph(game_map, tracker)
+
+
+def test_from_graph_reads_pieces():
+    _, nodes, state = make_state()
+    assert state.has_piece(nodes[0], "cube", "player1")
+    assert state.has_piece(nodes[1], "disc", "player2")
+    assert not state.has_piece(nodes[2], "cube", "player1")
+    assert state.mask() == 0b11
+    assert state.mask(piece="cube") == 0b1
+    assert state.mask(player="player2") == 0b10
+
+
+def test_apply_matches_placing_on_a_copy():
+    game_map, nodes, state = make_state()
+    placements = [("player3", nodes[5], False), ("player2", nodes[9], False)]
+
+    game_map_copy = copy_game_map(game_map)
+    for player, node, is_disc in placements:
+        place_player_piece(game_map_copy, node, player, is_disc)
+
+    state.apply(placements)
+    assert state.has_piece(nodes[5], "cube", "player3")
+    assert state.counts() == attached(game_map_copy, "hint_tracker").counts()
+    assert state.counts() == HintTracker.from_graph(game_map_copy).counts()
+
+
+def test_undo_restores_state():
+    _, nodes, state = make_state()
+    occupancy = dict(state.occupancy)
+    counts = state.counts()
+
+    state.apply([("player1", nodes[7], True), ("player3", nodes[7], False)])
+    state.apply([("player2", nodes[8], False)])
+    assert state.counts() != counts
+    state.undo()
+    state.undo()
+
+    assert state.occupancy == occupancy
+    assert state.counts() == counts
+    assert state.history == []
+
+
+def test_copy_is_independent():
+    _, nodes, state = make_state()
+    state_copy = state.copy()
+    state_copy.apply([("player3", nodes[4], False)])
+    assert not state.has_piece(nodes[4], "cube", "player3")
+    assert state.tracker.possible != state_copy.tracker.possible
+
+
+def test_cube_key_ignores_discs_and_order():
+    _, nodes, state = make_state()
+    key = state.cube_key([("player3", nodes[5], False), ("player3", nodes[6], False)])
+    assert key == state.cube_key(
+        [("player3", nodes[6], False), ("player1", nodes[2], True)]
+        + [("player3", nodes[5], False)]
+    )
+    state.apply([("player3", nodes[5], False), ("player3", nodes[6], False)])
+    assert state.cube_key() == key
@@ -1,4 +1,5 @@
 import networkx as nx
+import numpy as np
 import pytest
 
 from utils.graph_generate_random_area import (
@@ -23,7 +24,7 @@ def test_select_random_start_node():
     G = nx.Graph()
     G.add_nodes_from([1, 2, 3, 4, 5])
 
-    selected_node = select_random_start_node(G)
+    selected_node = select_random_start_node(np.random.default_rng(seed=42), G)
     assert selected_node in G.nodes
 
 
@@ -32,7 +33,9 @@ def test_expand_connected_area():
     start_node = (2, 2)  # Center node
     N = 7
 
-    connected_area = expand_connected_area(G, start_node, N)
+    connected_area = expand_connected_area(
+        np.random.default_rng(seed=42), G, start_node, N
+    )
 
     assert len(connected_area) == N
     assert start_node in connected_area
@@ -61,10 +64,11 @@ def test_integration():
     G = nx.grid_2d_graph(10, 10)
     attribute = "test_attr"
     N = 15
+    generator = np.random.default_rng(seed=42)
 
     initialize_node_attributes(G, attribute)
-    start_node = select_random_start_node(G)
-    connected_area = expand_connected_area(G, start_node, N)
+    start_node = select_random_start_node(generator, G)
+    connected_area = expand_connected_area(generator, G, start_node, N)
     assign_attribute_to_nodes(G, connected_area, attribute)
 
     assert sum(1 for node in G.nodes if G.nodes[node][attribute]) == N
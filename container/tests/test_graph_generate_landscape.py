@@ -1,9 +1,12 @@
 import networkx as nx
+import numpy as np
 import pytest
 
 from utils.graph_generate_landscape import (
     assign_random_attribute,
+    assign_random_attributes,
     generate_hexagonal_grid_graph,
+    get_hex_topology,
     get_hexagonal_neighbors,
     get_terrain_types,
     node_id_to_row_col,
@@ -13,11 +16,21 @@ from utils.graph_generate_landscape import (
 
 def test_assign_random_attribute():
     attributes = ["is_forest", "is_water", "is_mountain"]
-    result = assign_random_attribute(attributes)
+    result = assign_random_attribute(np.random.default_rng(seed=42), attributes)
     assert sum(result.values()) == 1
     assert all(isinstance(value, bool) for value in result.values())
 
 
+def test_assign_random_attributes():
+    attributes = ["is_forest", "is_water", "is_mountain"]
+    result = assign_random_attributes(np.random.default_rng(seed=42), attributes, 50)
+    assert len(result) == 50
+    assert all(sum(node_attr.values()) == 1 for node_attr in result)
+    assert assign_random_attributes(
+        np.random.default_rng(seed=1), attributes, 50
+    ) == assign_random_attributes(np.random.default_rng(seed=1), attributes, 50)
+
+
 @pytest.mark.parametrize(
     "node_id, expected",
     [
@@ -73,7 +86,7 @@ def test_get_hexagonal_neighbors():
 
 def test_generate_hexagonal_grid_graph():
     rows, cols = 4, 4
-    G = generate_hexagonal_grid_graph(rows, cols)
+    G = generate_hexagonal_grid_graph(np.random.default_rng(seed=42), rows, cols)
     assert isinstance(G, nx.Graph)
     assert len(G.nodes) == rows * cols
 
@@ -89,6 +102,28 @@ def test_generate_hexagonal_grid_graph():
             assert all((r, c) in G.neighbors(node) for r, c in neighbors)
 
 
+def test_get_hex_topology():
+    rows, cols = 5, 5
+    topology = get_hex_topology(rows, cols)
+    assert topology is get_hex_topology(rows, cols)
+    assert len(topology.nodes) == rows * cols
+
+    for i, (row, col) in enumerate(topology.nodes):
+        expected = set(get_hexagonal_neighbors(row, col, rows, cols))
+        assert {topology.nodes[j] for j in topology.neighbors[i]} == expected
+        assert topology.rings[0][i] == 1 << i
+        ring_one = {
+            topology.nodes[j]
+            for j in range(rows * cols)
+            if topology.rings[1][i] >> j & 1
+        }
+        assert ring_one == expected | {(row, col)}
+
+    G = nx.Graph(topology.edges)
+    assert all(G.has_edge(u, v) for u, v in G.edges())
+    assert topology.adjacency.sum() == rows * cols + 2 * len(topology.edges)
+
+
 def test_get_terrain_types():
     terrains = get_terrain_types()
     assert set(terrains) == {"swamp", "forest", "water", "mountain", "desert"}
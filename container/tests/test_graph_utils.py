@@ -4,20 +4,25 @@ import unittest
 from unittest import mock
 
 import networkx as nx
+import numpy as np
 
 from utils.graph_generate_landscape import generate_hexagonal_grid_graph
 from utils.graph_utils import (
+    closed_adjacency_matrix,
     enrich_node_attributes,
     filter_nodes_by_attributes,
     generate_unique_code,
     parse_code_to_graph,
     serialize_graph,
+    update_neighbors_with_prefix,
 )
 
 
 class TestGraphUtils(unittest.TestCase):
     def setUp(self):
-        self.graph = generate_hexagonal_grid_graph(8, 11)
+        self.graph = generate_hexagonal_grid_graph(
+            np.random.default_rng(seed=42), 8, 11
+        )
 
     def test_serialize_graph(self):
         serialized = serialize_graph(self.graph)
@@ -79,6 +84,26 @@ class TestGraphUtils(unittest.TestCase):
                 )
             )
 
+    def test_enrich_node_attributes_matches_per_attribute_update(self):
+        reference = nx.Graph()
+        reference.add_nodes_from(
+            (node, dict(attrs)) for node, attrs in self.graph.nodes(data=True)
+        )
+        reference.add_edges_from(self.graph.edges())
+        for terrain in ["swamp", "forest", "water", "mountain", "desert"]:
+            update_neighbors_with_prefix(reference, f"is_{terrain}", "neighbor")
+
+        enriched_graph = enrich_node_attributes(self.graph)
+        for node in reference.nodes:
+            self.assertEqual(enriched_graph.nodes[node], reference.nodes[node])
+
+    def test_closed_adjacency_matrix(self):
+        adjacency = closed_adjacency_matrix(self.graph)
+        self.assertEqual(adjacency.shape, (88, 88))
+        self.assertTrue(adjacency.diagonal().all())
+        self.assertTrue((adjacency == adjacency.T).all())
+        self.assertEqual(adjacency.sum() - 88, 2 * self.graph.number_of_edges())
+
     def test_filter_nodes_by_attributes(self):
         for terrain in ["swamp", "forest", "water", "mountain", "desert"]:
             filtered_nodes = filter_nodes_by_attributes(
@@ -0,0 +1,81 @@
+import numpy as np
+
+from cryptid.game_rules import get_q_value, score_moves
+from cryptid.interning import (
+    HINTS,
+    clear_session,
+    intern_hint,
+    intern_key,
+    intern_move,
+    intern_state,
+    key_values,
+)
+from cryptid.q_table import QDelta, QTable, ShardedQTable, get_many_interned
+
+KEY = ("player1-20-25-25", ("animal_bear", "animal_cougar"), ("question", (1, 2)))
+
+
+def test_hints_are_interned_sorted():
+    hint_id = intern_hint(["animal_cougar", "animal_bear"])
+    assert intern_hint(("animal_bear", "animal_cougar")) == hint_id
+    assert HINTS.value(hint_id) == ("animal_bear", "animal_cougar")
+    assert key_values(*intern_key(KEY)) == KEY
+
+
+def test_interned_lookups_match_value_keys(tmp_path):
+    other = ("other", KEY[1], KEY[2])
+    for q_matrix in (
+        {},
+        QTable(),
+        ShardedQTable(tmp_path),
+        QDelta(QTable()),
+    ):
+        q_matrix[KEY] = 2.5
+        ids = intern_key(KEY)
+        values = get_many_interned(
+            q_matrix,
+            np.array([ids[0], intern_state(other[0])]),
+            ids[1],
+            ids[2],
+            default=1,
+        )
+        assert values.tolist() == [2.5, 1.0]
+        assert get_q_value(q_matrix, KEY[2], KEY[0], list(reversed(KEY[1]))) == 2.5
+
+
+def test_q_table_translates_session_ids(tmp_path):
+    q_table = QTable(tmp_path)
+    q_table[KEY] = 4.0
+    q_table.save()
+    # Values interned by the session before the table knew them
+    intern_state("state interned first")
+    intern_move(("cube", (9, 9)))
+
+    reopened = QTable(tmp_path)
+    assert reopened[KEY] == 4.0
+    assert reopened.get(("state interned first", KEY[1], ("cube", (9, 9)))) is None
+    moves = [(*KEY[2], {KEY[0]: 1, "unknown": 1})]
+    assert score_moves(reopened, moves, KEY[1]).tolist() == [2.5]
+
+
+def test_q_table_translates_only_requested_ids():
+    for i in range(1000):
+        intern_state(f"seen earlier {i}")
+    q_table = QTable()
+    lookups = []
+    q_table.states.id = lambda value, add=True: lookups.append(value)
+    q_table.get_many_interned(intern_state("requested"), 0, 0, default=1)
+    q_table.get_interned(intern_state("requested"), 0, 0)
+    assert lookups == ["requested"]
+
+
+def test_clear_session_invalidates_translations():
+    q_table = QTable()
+    q_table[KEY] = 3.0
+    assert q_table.get_interned(*intern_key(KEY)) == 3.0
+    clear_session()
+    assert len(HINTS) == 0
+    # Old ids would now stand for other values, the table translates afresh
+    intern_state("first after clear")
+    assert q_table.get_interned(*intern_key(KEY)) == 3.0
+    assert q_table.get(("first after clear", KEY[1], KEY[2])) is None
@@ -0,0 +1,148 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from cryptid.bitboard import BitBoard
+from cryptid.board import generate_game_map, get_base_attributes
+from cryptid.game_rules import count_tiles_fitting_hints, sample_puzzle
+from cryptid.puzzle_store import (
+    PuzzleStore,
+    expand_puzzle,
+    import_json_puzzles,
+    load_json_puzzle,
+    pack_game_map,
+    unpack_puzzle,
+)
+from utils.graph_utils import serialize_graph
+
+
+@pytest.fixture(scope="module")
+def puzzle():
+    generator = np.random.default_rng(seed=42)
+    game_map = generate_game_map(generator, 11, 8)
+    hints, cryptid = sample_puzzle(generator, game_map)
+    return game_map, list(hints), cryptid
+
+
+def test_pack_unpack(puzzle):
+    game_map, hints, cryptid = puzzle
+    record = pack_game_map(game_map, hints, 11, 8)
+    stored = unpack_puzzle("code", record)
+    assert (stored.rows, stored.cols) == (11, 8)
+    assert list(stored.hints) == hints
+    assert stored.cryptid == cryptid
+    assert np.array_equal(
+        stored.planes, BitBoard.from_graph(game_map).planes(get_base_attributes())
+    )
+
+
+def test_pack_rejects_ambiguous_hints(puzzle):
+    game_map, _, _ = puzzle
+    with pytest.raises(ValueError):
+        pack_game_map(game_map, [("is_forest", "is_water")] * 3, 11, 8)
+
+
+def test_expand_puzzle(puzzle):
+    game_map, hints, cryptid = puzzle
+    board = expand_puzzle(unpack_puzzle("code", pack_game_map(game_map, hints, 11, 8)))
+    assert count_tiles_fitting_hints(board, hints) == (1, [cryptid])
+    for node, attrs in game_map.nodes(data=True):
+        assert all(board.has(node, attr) == value for attr, value in attrs.items())
+    assert set(board.edges) == set(game_map.edges())
+
+
+def test_store_append_and_fetch(tmp_path, puzzle):
+    game_map, hints, cryptid = puzzle
+    store = PuzzleStore(str(tmp_path))
+    assert len(store) == 0
+
+    code, added = store.append_game_map(game_map, hints, 11, 8)
+    assert added
+    second_hints = [hints[1], hints[2], hints[0]]
+    second_code, _ = store.append_game_map(game_map, second_hints, 11, 8)
+    assert store.append_game_map(game_map, hints, 11, 8) == (code, False)
+
+    reopened = PuzzleStore(str(tmp_path))
+    assert len(reopened) == 2
+    assert code in reopened and second_code in reopened
+    assert reopened[0].code == code
+    assert list(reopened[1].hints) == second_hints
+    assert reopened[1].cryptid == cryptid
+
+
+def test_store_extends_codes_incrementally(tmp_path, puzzle, monkeypatch):
+    game_map, hints, _ = puzzle
+    store = PuzzleStore(str(tmp_path))
+    store.append_game_map(game_map, hints, 11, 8)
+    codes = store.codes()
+
+    # Appends by this store do not read the index back
+    def no_read(*args, **kwargs):
+        raise AssertionError("index read while appending")
+
+    with monkeypatch.context() as m:
+        m.setattr(np, "fromfile", no_read)
+        for i in range(1, 3):
+            _, added = store.append_game_map(game_map, hints[i:] + hints[:i], 11, 8)
+            assert added
+    assert store.codes() is codes and len(codes) == 3
+
+    # Appends by another writer are picked up
+    other = PuzzleStore(str(tmp_path))
+    code, added = other.append_game_map(game_map, hints[::-1], 11, 8)
+    assert added and code in store and len(store.codes()) == 4
+
+
+def test_import_json_puzzles(tmp_path, puzzle):
+    game_map, hints, _ = puzzle
+    json_dir = tmp_path / "json"
+    json_dir.mkdir()
+    # A legacy puzzle whose hints fit several cells sorts before the valid one
+    (json_dir / "abc.json").write_text(serialize_graph(game_map, hints=[hints[0]] * 3))
+    (json_dir / "xyz.json").write_text(serialize_graph(game_map, hints=hints))
+    (json_dir / "qmatrix.json").write_text(json.dumps({"nodes": {}}))
+
+    store = PuzzleStore(str(tmp_path / "store"))
+    appended, skipped = import_json_puzzles(store, str(json_dir))
+    assert appended == 1
+    assert sorted(skipped) == ["abc.json", "qmatrix.json"]
+    assert "instead of exactly one" in skipped["abc.json"]
+    assert list(store[0].hints) == hints
+
+
+def test_lazy_puzzle(tmp_path, puzzle):
+    game_map, hints, cryptid = puzzle
+    store = PuzzleStore(str(tmp_path))
+    store.append_game_map(game_map, hints, 11, 8)
+
+    loaded = store.load(0)
+    assert loaded.cryptid == cryptid
+    assert loaded.hints_players["player2"] == list(hints[1])
+    assert "board" not in vars(loaded) and "graph" not in vars(loaded)
+    assert count_tiles_fitting_hints(loaded.graph, hints) == (1, [cryptid])
+    assert "board" in vars(loaded)
+
+
+def test_load_many(tmp_path, puzzle):
+    game_map, hints, cryptid = puzzle
+    store = PuzzleStore(str(tmp_path))
+    store.append_game_map(game_map, hints, 11, 8)
+    store.append_game_map(game_map, hints[::-1], 11, 8)
+
+    puzzles = store.load_many([1, 0], enrich=True)
+    assert [p.code for p in puzzles] == [store[1].code, store[0].code]
+    for loaded in puzzles:
+        assert "board" in vars(loaded)
+        assert loaded.board.masks == store.load(0).board.masks
+
+
+def test_load_json_puzzle(tmp_path, puzzle):
+    game_map, hints, cryptid = puzzle
+    (tmp_path / "abc.json").write_text(serialize_graph(game_map, hints=hints))
+
+    loaded = load_json_puzzle("abc.json", str(tmp_path))
+    assert loaded.hints == tuple(tuple(hint) for hint in hints)
+    assert loaded.cryptid == cryptid
+    assert set(loaded.graph.edges()) == set(game_map.edges())
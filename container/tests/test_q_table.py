@@ -0,0 +1,174 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from cryptid.game_rules import read_qmatrix, save_q_matrix, update_q_matrix
+from cryptid.q_table import (
+    LOG_ENTRY,
+    HashTable,
+    Interner,
+    QDelta,
+    QTable,
+    ShardedQTable,
+    merge_deltas,
+)
+
+KEY = ("player1-20-25-25", ("animal_bear", "animal_cougar"), ("question", (1, 2)))
+
+
+def test_interner_round_trip(tmp_path):
+    interner = Interner(["a", ("b", (1, 2))])
+    assert interner.id("a") == 0
+    assert interner.id("c", add=False) is None
+    interner.append_new(tmp_path / "values.txt")
+
+    loaded = Interner()
+    loaded.load(tmp_path / "values.txt")
+    assert loaded.values == ["a", ("b", (1, 2))]
+
+
+def test_hash_table_grows():
+    table = HashTable(capacity=4)
+    for key in range(1000):
+        table.put(key * 7919, float(key))
+    assert len(table) == 1000
+    assert len(table.keys) >= 2000
+    assert table.get(7919 * 500) == 500.0
+    assert table.get(3, "missing") == "missing"
+    values = table.get_many(
+        np.array([7919 * 500, 3, 7919 * 999], dtype=np.uint64), -1.0
+    )
+    assert values.tolist() == [500.0, -1.0, 999.0]
+
+
+def test_q_table_behaves_like_dict():
+    q_table = QTable()
+    assert q_table.get(KEY, 1) == 1
+    q_table[KEY] = 2.5
+    q_table[KEY] = 3.5
+    assert q_table[KEY] == 3.5
+    assert KEY in q_table
+    assert len(q_table) == 1
+    assert dict(q_table.items()) == {KEY: 3.5}
+    with pytest.raises(KeyError):
+        q_table[("other", KEY[1], KEY[2])]
+
+
+def test_q_table_appends_only_changes(tmp_path):
+    q_table = QTable(tmp_path)
+    for i in range(10):
+        q_table[(f"state{i}", KEY[1], KEY[2])] = float(i)
+    q_table.save()
+    q_table.compact()
+    assert q_table.log_size() == 0
+
+    q_table = QTable(tmp_path)
+    q_table[("state3", KEY[1], KEY[2])] = 30.0
+    q_table[("new", KEY[1], KEY[2])] = -1.0
+    q_table.save()
+    assert q_table.log_size() == 2
+
+    q_table = QTable(tmp_path)
+    assert len(q_table) == 11
+    assert q_table[("state3", KEY[1], KEY[2])] == 30.0
+    assert q_table[("new", KEY[1], KEY[2])] == -1.0
+    assert q_table[("state4", KEY[1], KEY[2])] == 4.0
+
+
+def test_q_table_reopens_after_compact(tmp_path):
+    q_table = QTable(tmp_path)
+    for i in range(10):
+        q_table[(f"state{i}", KEY[1], KEY[2])] = float(i)
+    q_table.save()
+    # Unsaved changes are kept by the compaction too
+    q_table[("state2", KEY[1], KEY[2])] = 20.0
+    q_table.compact()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "hints.txt",
+        "moves.txt",
+        "states.txt",
+        "table.npy",
+    ]
+
+    reopened = QTable(tmp_path)
+    assert dict(reopened.items()) == dict(q_table.items())
+    assert reopened[("state2", KEY[1], KEY[2])] == 20.0
+    reopened[("state11", KEY[1], KEY[2])] = 11.0
+    reopened.save()
+    reopened.compact()
+    assert len(QTable(tmp_path)) == 11
+
+    # A log left behind by a crash after the swap replays onto the new base table
+    keys, values = reopened.table.items()
+    entries = np.zeros(1, dtype=LOG_ENTRY)
+    entries["key"], entries["value"] = keys[0], values[0]
+    entries.tofile(tmp_path / "log.bin")
+    assert dict(QTable(tmp_path).items()) == dict(reopened.items())
+
+
+def test_read_qmatrix_migrates_pickle(tmp_path):
+    legacy_path = tmp_path / "qmatrix.pkl"
+    with open(legacy_path, "wb") as f:
+        pickle.dump({KEY: 7.0}, f)
+
+    # Without a legacy path nothing is migrated
+    assert KEY not in read_qmatrix(tmp_path / "fresh", None)
+
+    q_matrix = read_qmatrix(tmp_path / "qtable", legacy_path)
+    assert q_matrix[KEY] == 7.0
+
+    moves = [(("question", (1, 2), "player2"), "s1", ["animal_cougar", "animal_bear"])]
+    q_matrix, _ = update_q_matrix(q_matrix, moves, "final", True)
+    save_q_matrix(q_matrix)
+    assert read_qmatrix(tmp_path / "qtable", legacy_path)[
+        ("s1", KEY[1], ("question", (1, 2)))
+    ] == pytest.approx(10.0)
+
+
+def test_sharded_q_table_loads_only_used_shards(tmp_path):
+    other_hint = ("is_desert", "is_water")
+    q_table = ShardedQTable(tmp_path)
+    q_table[KEY] = 1.0
+    q_table[("s", other_hint, KEY[2])] = 2.0
+    q_table.save()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "animal_bear+animal_cougar",
+        "is_desert+is_water",
+    ]
+
+    q_table = ShardedQTable(tmp_path, hints=[("animal_cougar", "animal_bear")])
+    assert list(q_table.shards) == [KEY[1]]
+    assert q_table.get(("s", ("is_forest", "is_water"), KEY[2]), 1) == 1
+    assert list(q_table.shards) == [KEY[1]]
+    assert q_table[("s", other_hint, KEY[2])] == 2.0
+    assert len(q_table.shards) == 2
+
+
+def test_read_qmatrix_splits_flat_table(tmp_path):
+    flat = QTable(tmp_path)
+    flat[KEY] = 4.0
+    flat.save()
+
+    q_matrix = read_qmatrix(tmp_path, tmp_path / "missing.pkl", hints=[KEY[1]])
+    assert isinstance(q_matrix, ShardedQTable)
+    assert q_matrix[KEY] == 4.0
+    assert [p.name for p in tmp_path.iterdir()] == ["animal_bear+animal_cougar"]
+
+
+def test_q_delta_merges_concurrent_changes():
+    master = QTable()
+    master[KEY] = 5.0
+    other = ("s2", KEY[1], KEY[2])
+
+    first, second = QDelta(master), QDelta(master)
+    first[KEY] = first.get(KEY, 0) + 1.0
+    second[KEY] = second.get(KEY, 0) + 2.0
+    second[other] = 3.0
+    assert master[KEY] == 5.0
+    assert first[KEY] == 6.0
+
+    merge_deltas(master, first.deltas())
+    merge_deltas(master, second.deltas())
+    assert master[KEY] == 8.0
+    assert master[other] == 3.0
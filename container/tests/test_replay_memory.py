@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from cryptid.interning import intern_hint
+from cryptid.replay_memory import ReplayMemory
+
+
+def test_replay_memory_evicts_oldest():
+    memory = ReplayMemory(capacity=3)
+    for i in range(5):
+        memory.add(f"s{i}", ("question", (0, i)), ["is_bear", "neighbor_is_bear"])
+    assert len(memory) == 3
+    assert memory.episode(0) == [
+        (f"s{i}", ("question", (0, i)), ("is_bear", "neighbor_is_bear"))
+        for i in range(2, 5)
+    ]
+
+
+def test_replay_memory_episodes():
+    memory = ReplayMemory(capacity=10)
+    first, second = memory.new_game(), memory.new_game()
+    memory.add("a", ("wild_guess", (1, 1)), ["blue"], first)
+    memory.add("b", ("wild_guess", (1, 2)), ["green"], second)
+    memory.add("c", ("wild_guess", (1, 3)), ["blue"], first)
+    assert [state for state, _, _ in memory.episode(first)] == ["a", "c"]
+    assert [state for state, _, _ in memory.episode(second)] == ["b"]
+    # Hints are recorded by their shared session id, as sorted tuples
+    assert memory.hint_ids[0] == memory.hint_ids[2] == intern_hint(["blue"])
+    memory.add("d", ("wild_guess", (1, 4)), ["red", "blue"], second)
+    assert memory.episode(second)[-1][2] == ("blue", "red")
+
+
+def test_replay_memory_prioritized_sampling():
+    generator = np.random.default_rng(seed=0)
+    memory = ReplayMemory(capacity=10)
+    for i in range(4):
+        memory.add(f"s{i}", ("cube", (0, i)), ["blue"])
+    memory.update_priorities([0, 1, 2], [0.0, 0.0, 0.0])
+
+    rows, weights = memory.sample(generator, 20, alpha=1.0)
+    assert set(rows.tolist()) == {3}
+    assert np.allclose(weights, 1.0)
+    assert memory.transitions(rows[:1]) == [("s3", ("cube", (0, 3)), ("blue",))]
+
+    rows, weights = memory.sample(generator, 50)
+    assert len(set(rows.tolist())) > 1
+    assert (weights == 1).all()
+
+
+def test_replay_memory_new_entries_get_max_priority():
+    memory = ReplayMemory(capacity=4)
+    memory.add("a", ("cube", (0, 0)), ["blue"], priority=5.0)
+    row = memory.add("b", ("cube", (0, 1)), ["blue"])
+    assert memory.priorities[row] == 5.0
+    with pytest.raises(ValueError):
+        ReplayMemory().sample(np.random.default_rng(), 1)
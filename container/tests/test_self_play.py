@@ -0,0 +1,85 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from cryptid.evaluation_pool import LocalEvaluator
+from cryptid.farming import farm_shard
+from cryptid.game_rules import compile_hint_masks, initialize_player_pieces
+from cryptid.puzzle_store import PuzzleStore
+from cryptid.q_table import ShardedQTable
+from cryptid.self_play import play_game, self_play_worker, train_self_play
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    store = PuzzleStore(tmp_path / "puzzles")
+    for record in farm_shard((np.random.SeedSequence(1), 1, 11, 8, 3)):
+        store.append_record(record)
+    return str(tmp_path / "puzzles")
+
+
+def test_self_play_worker_returns_deltas(store_dir, tmp_path):
+    qtable_dir = str(tmp_path / "qtable")
+    deltas, played, won = self_play_worker(
+        (np.random.SeedSequence(2), 1, store_dir, qtable_dir, False)
+    )
+    assert played == 1
+    assert deltas
+    # Workers never write the table
+    assert len(ShardedQTable(qtable_dir)) == 0
+    assert not list((tmp_path / "qtable").iterdir())
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_train_self_play_merges_all_games(store_dir, tmp_path, batched):
+    qtable_dir = str(tmp_path / "qtable")
+    legacy_key = ("legacy", ("is_desert", "is_water"), ("question", (0, 0)))
+    legacy_path = tmp_path / "qmatrix.pkl"
+    with open(legacy_path, "wb") as f:
+        pickle.dump({legacy_key: 7.0}, f)
+    played, won = train_self_play(
+        3,
+        3,
+        merge_interval=2,
+        store_dir=store_dir,
+        qtable_dir=qtable_dir,
+        processes=2,
+        batched=batched,
+        legacy_path=legacy_path,
+    )
+    assert played == 3
+    assert 0 <= won <= 3
+
+    q_table = ShardedQTable(qtable_dir)
+    for shard in (tmp_path / "qtable").iterdir():
+        q_table.shard(tuple(shard.name.split("+")))
+    assert len(q_table) > 1
+    assert q_table[legacy_key] == 7.0
+
+
+def test_play_game_ends_when_a_player_is_stuck(store_dir):
+    store = PuzzleStore(store_dir)
+    stuck_games = 0
+    for seed in range(4):
+        puzzle = store.load(0)
+        game_map = puzzle.graph
+        compile_hint_masks(game_map)
+        initialize_player_pieces(game_map)
+        messages = []
+        _, game_won, _ = play_game(
+            np.random.default_rng(seed),
+            game_map,
+            puzzle.hints_players,
+            {},
+            LocalEvaluator(game_map),
+            log=messages.append,
+            rounds=100,
+        )
+        stuck = [i for i, m in enumerate(messages) if m.endswith("Game ends.")]
+        if stuck:
+            # Nothing is played after the first stuck player
+            assert not game_won
+            assert messages[stuck[0] + 1 :] == ["Game ended without a winner."]
+            stuck_games += 1
+    assert stuck_games
@@ -0,0 +1,27 @@
+from cryptid.state_cache import StateCache
+
+
+def test_state_cache_counts_hits_and_misses():
+    cache = StateCache(maxsize=10)
+    assert cache.get((1, 0, 0)) is None
+    cache.put((1, 0, 0), (25, 25, 24))
+    assert cache.get((1, 0, 0)) == (25, 25, 24)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_rate() == 0.5
+
+
+def test_state_cache_evicts_least_recently_used():
+    cache = StateCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+def test_state_cache_disabled():
+    cache = StateCache(maxsize=0)
+    cache.put("a", 1)
+    assert len(cache) == 0
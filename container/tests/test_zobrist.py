@@ -0,0 +1,70 @@
+import numpy as np
+
+from cryptid.board import generate_game_map
+from cryptid.game_rules import (
+    attached,
+    copy_game_map,
+    initialize_player_pieces,
+    place_player_piece,
+    process_move_mapcode,
+)
+from cryptid.zobrist import ZobristHash, piece_keys
+
+
+def make_game_map(seed=3):
+    game_map = generate_game_map(np.random.default_rng(seed=seed), 11, 8)
+    initialize_player_pieces(game_map)
+    return game_map
+
+
+def test_incremental_hash_matches_hash_from_scratch():
+    game_map = make_game_map()
+    nodes = list(game_map.nodes)
+    empty_code = process_move_mapcode(game_map, "player1")
+    place_player_piece(game_map, nodes[0], "player1", False)
+    place_player_piece(game_map, nodes[7], "player3", True)
+    code = process_move_mapcode(game_map, "player1")
+    assert code != empty_code
+    assert len(code) == 32
+
+    rehashed = ZobristHash.from_graph(
+        game_map, attached(game_map, "zobrist").cell_index
+    )
+    assert rehashed.code() == code
+    # Placing a piece that is already there leaves the state unchanged
+    place_player_piece(game_map, nodes[0], "player1", False)
+    assert process_move_mapcode(game_map, "player2") == code
+
+
+def test_hash_depends_on_pieces_not_on_order():
+    first, second = make_game_map(), make_game_map()
+    nodes = list(first.nodes)
+    placements = [(nodes[2], "player2", False), (nodes[4], "player1", True)]
+    for node, player, is_disc in placements:
+        place_player_piece(first, node, player, is_disc)
+    for node, player, is_disc in reversed(placements):
+        place_player_piece(second, node, player, is_disc)
+    assert process_move_mapcode(first, "player1") == process_move_mapcode(
+        second, "player1"
+    )
+
+    copy = copy_game_map(first)
+    place_player_piece(copy, nodes[5], "player3", False)
+    assert process_move_mapcode(copy, "player1") != process_move_mapcode(
+        first, "player1"
+    )
+    # Same pieces on another board
+    other = make_game_map(seed=4)
+    for node, player, is_disc in placements:
+        place_player_piece(other, node, player, is_disc)
+    assert process_move_mapcode(other, "player1") != process_move_mapcode(
+        first, "player1"
+    )
+
+
+def test_piece_keys_are_fixed():
+    keys = piece_keys(88)
+    assert keys.shape == (88, 3, 2)
+    assert len(np.unique(keys)) == keys.size
+    piece_keys.cache_clear()
+    assert np.array_equal(piece_keys(88), keys)
@@ -0,0 +1,37 @@
+import argparse
+
+from cryptid.self_play import train_self_play
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Train the Q-table with parallel self-play"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--games", type=int, default=64)
+    parser.add_argument("--merge-interval", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument(
+        "--batched",
+        action="store_true",
+        help="Play the games of each worker in lockstep on arrays",
+    )
+    parser.add_argument("--store", default="/opt/container/output/puzzles")
+    parser.add_argument("--qtable", default="/opt/container/output/qtable")
+    parser.add_argument(
+        "--legacy-qmatrix",
+        default=None,
+        help="Pickled Q-matrix to migrate into a new --qtable directory",
+    )
+    args = parser.parse_args()
+
+    played, won = train_self_play(
+        args.seed,
+        args.games,
+        merge_interval=args.merge_interval,
+        store_dir=args.store,
+        qtable_dir=args.qtable,
+        processes=args.processes,
+        batched=args.batched,
+        legacy_path=args.legacy_qmatrix,
+    )
+    print(f"Training done: {played} games played, {won} won")
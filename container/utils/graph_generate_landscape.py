@@ -1,39 +1,45 @@
-import random
-from typing import Any, Dict, List, Tuple, Union
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Tuple, Union
 
 import networkx as nx
+import numpy as np
 
 
-def assign_random_attribute(attributes):
+def assign_random_attribute(
+    generator: np.random.Generator, attributes: List[str]
+) -> Dict[str, bool]:
     """
     Randomly assign one of the attributes to True, others to False.
 
     Parameters:
+    - generator: The NumPy random number generator.
     - attributes: List of attribute names.
 
     Returns:
     - Dictionary with one attribute set to True and others set to False.
     """
-    node_attr = {attr: False for attr in attributes}
-    chosen_attr = random.choice(attributes)
-    node_attr[chosen_attr] = True
-    return node_attr
+    return assign_random_attributes(generator, attributes, 1)[0]
 
 
-def assign_random_attribute(attributes: List[str]) -> Dict[str, bool]:
+def assign_random_attributes(
+    generator: np.random.Generator, attributes: List[str], n: int
+) -> List[Dict[str, bool]]:
     """
-    Randomly assign one of the attributes to True, others to False.
+    Randomly assign one of the attributes to True, others to False, for n nodes at once.
 
     Parameters:
+    - generator: The NumPy random number generator.
     - attributes: List of attribute names.
+    - n: The number of nodes.
 
     Returns:
-    - Dictionary with one attribute set to True and others set to False.
+    - A list of n dictionaries, each with one attribute set to True and others set to False.
     """
-    node_attr: Dict[str, bool] = {attr: False for attr in attributes}
-    chosen_attr: str = random.choice(attributes)
-    node_attr[chosen_attr] = True
-    return node_attr
+    chosen = generator.integers(0, len(attributes), size=n)
+    return [
+        {attr: bool(k == c) for k, attr in enumerate(attributes)}
+        for c in chosen.tolist()
+    ]
 
 
 def node_id_to_row_col(
@@ -170,37 +176,112 @@ def add_hexagonal_edges(G: nx.Graph, rows: int, cols: int) -> None:
             add_edges_for_node(G, node, rows, cols)
 
 
+class HexTopology(NamedTuple):
+    """
+    Neighbor structure of a hexagonal grid, shared by every board of the same shape.
+
+    Cells are indexed row-major: cell i is nodes[i] and index[node] is i.
+    """
+
+    rows: int
+    cols: int
+    nodes: Tuple[Tuple[int, int], ...]
+    index: Dict[Tuple[int, int], int]
+    neighbors: Tuple[Tuple[int, ...], ...]
+    edges: Tuple[Tuple[Tuple[int, int], Tuple[int, int]], ...]
+    adjacency: np.ndarray
+    rings: Tuple[Tuple[int, ...], ...]
+
+
+@lru_cache(maxsize=None)
+def get_hex_topology(rows: int, cols: int, max_distance: int = 3) -> HexTopology:
+    """
+    Compute the neighbor table, edge list and distance rings of a hexagonal grid once per shape.
+
+    Parameters:
+    - rows: Number of rows in the grid.
+    - cols: Number of columns in the grid.
+    - max_distance: The largest distance for which rings are computed (default is 3).
+
+    Returns:
+    - A HexTopology. The adjacency matrix is closed (every cell is adjacent to itself) and
+      read-only; rings[k][i] is a bitmask of the cells within distance k of cell i.
+    """
+    nodes = tuple((row, col) for row in range(rows) for col in range(cols))
+    index = {node: i for i, node in enumerate(nodes)}
+
+    neighbors = []
+    edges = []
+    seen = set()
+    for i, (row, col) in enumerate(nodes):
+        cell_neighbors = [
+            index[neighbor]
+            for neighbor in get_hexagonal_neighbors(row, col, rows, cols)
+        ]
+        neighbors.append(tuple(cell_neighbors))
+        # Same edge order as add_hexagonal_edges, so graphs serialize identically
+        for j in cell_neighbors:
+            if (j, i) not in seen:
+                seen.add((i, j))
+                edges.append((nodes[i], nodes[j]))
+
+    adjacency = np.eye(len(nodes), dtype=bool)
+    for i, cell_neighbors in enumerate(neighbors):
+        adjacency[i, list(cell_neighbors)] = True
+    adjacency.setflags(write=False)
+
+    rings = []
+    within = np.eye(len(nodes), dtype=bool)
+    for distance in range(max_distance + 1):
+        if distance > 0:
+            within = (within.astype(np.float32) @ adjacency.astype(np.float32)) > 0
+        rings.append(
+            tuple(sum(1 << int(j) for j in np.flatnonzero(row)) for row in within)
+        )
+
+    return HexTopology(
+        rows,
+        cols,
+        nodes,
+        index,
+        tuple(neighbors),
+        tuple(edges),
+        adjacency,
+        tuple(rings),
+    )
+
+
 def get_terrain_types():
     return ["swamp", "forest", "water", "mountain", "desert"]
 
 
-def generate_hexagonal_grid_graph(rows, cols):
+def generate_hexagonal_grid_graph(generator, rows, cols):
     """
     Generate a hexagonal grid graph where each node is assigned one of the boolean flags:
     is_Swamp, is_Forest, is_Water, is_Mountain, is_Desert (uniquely).
 
+    The neighbor structure comes from the cached topology of the grid shape, so only the
+    terrain is drawn per board, in a single call to the generator.
+
     Parameters:
+    - generator: The NumPy random number generator.
     - rows: Number of rows in the grid.
     - cols: Number of columns in the grid.
 
     Returns:
     - A networkx graph (nx.Graph) representing the hexagonal grid with assigned boolean attributes.
     """
+    topology = get_hex_topology(rows, cols)
     G = nx.Graph()
 
     attributes = [f"is_{terrain}" for terrain in get_terrain_types()]
 
     # Add nodes with random attributes
-    for row in range(rows):
-        for col in range(cols):
-            node = (row, col)
-            node_attr = assign_random_attribute(attributes)
-            G.add_node(node, **node_attr)
+    node_attrs = assign_random_attributes(generator, attributes, len(topology.nodes))
+    G.add_nodes_from(zip(topology.nodes, node_attrs))
 
-    print(f"Number of nodes: {G.number_of_nodes()}")
-    print(f"Number of edges: {G.number_of_edges()}")
     # Add edges
-    add_hexagonal_edges(G, rows, cols)
+    G.add_edges_from(topology.edges)
 
     # Print number of nodes and edges
     print(f"Number of nodes: {G.number_of_nodes()}")
@@ -211,7 +292,7 @@ def generate_hexagonal_grid_graph(rows, cols):
 
 if __name__ == "__main__":
     # Example Usage
-    G = generate_hexagonal_grid_graph(8, 11)
+    G = generate_hexagonal_grid_graph(np.random.default_rng(), 8, 11)
 
     # Print node attributes
     for node, data in G.nodes(data=True):
@@ -1,6 +1,5 @@
-import random
-
 import networkx as nx
+import numpy as np
 
 
 def initialize_node_attributes(G: nx.Graph, attribute: str) -> None:
@@ -15,24 +14,29 @@ def initialize_node_attributes(G: nx.Graph, attribute: str) -> None:
         G.nodes[node].setdefault(attribute, False)
 
 
-def select_random_start_node(G: nx.Graph) -> int:
+def select_random_start_node(generator: np.random.Generator, G: nx.Graph) -> int:
     """
     Select a random starting node from the graph.
 
     Parameters:
+    - generator: The NumPy random number generator.
     - G: The networkx graph (nx.Graph).
 
     Returns:
     - A randomly selected node.
     """
-    return random.choice(list(G.nodes))
+    nodes = list(G.nodes)
+    return nodes[generator.integers(0, len(nodes))]
 
 
-def expand_connected_area(G: nx.Graph, start_node: int, N: int) -> set:
+def expand_connected_area(
+    generator: np.random.Generator, G: nx.Graph, start_node: int, N: int
+) -> set:
     """
     Expand from the start node to create a connected area of N nodes.
 
     Parameters:
+    - generator: The NumPy random number generator.
     - G: The networkx graph (nx.Graph).
     - start_node: The node from which to start the expansion.
     - N: The desired size of the connected area.
@@ -48,7 +52,7 @@ def expand_connected_area(G: nx.Graph, start_node: int, N: int) -> set:
         if current_node not in visited:
             visited.add(current_node)
             neighbors = list(G.neighbors(current_node))
-            random.shuffle(neighbors)  # Shuffle to ensure randomness
+            generator.shuffle(neighbors)  # Shuffle to ensure randomness
             queue.extend(neighbors)
 
     return visited
@@ -71,12 +75,15 @@ def assign_attribute_to_nodes(G: nx.Graph, nodes: set, attribute: str) -> None:
             G.nodes[node].setdefault(attribute, False)
 
 
-def add_connected_area_attribute(G: nx.Graph, attribute: str, N: int) -> None:
+def add_connected_area_attribute(
+    generator: np.random.Generator, G: nx.Graph, attribute: str, N: int
+) -> None:
     """
     Orchestrates the process of adding an attribute to a random hexagon node and generating
     a connected area of N nodes with the given attribute set to True.
 
     Parameters:
+    - generator: The NumPy random number generator.
     - G: The networkx graph (nx.Graph) representing the hexagonal grid.
     - attribute: The name of the attribute to be added.
     - N: The size of the connected area to be created.
@@ -87,17 +94,53 @@ def add_connected_area_attribute(G: nx.Graph, attribute: str, N: int) -> None:
         )
 
     initialize_node_attributes(G, attribute)
-    start_node = select_random_start_node(G)
-    connected_area = expand_connected_area(G, start_node, N)
+    start_node = select_random_start_node(generator, G)
+    connected_area = expand_connected_area(generator, G, start_node, N)
     assign_attribute_to_nodes(G, connected_area, attribute)
 
 
+def generate_connected_area_planes(
+    generator: np.random.Generator, adjacency: np.ndarray, n: int, N: int
+) -> np.ndarray:
+    """
+    Grow a random connected area of N nodes on each of n boards at once.
+
+    Every board starts from a random node and, N - 1 times, adds a random node adjacent to
+    its area, so all boards grow in lockstep with a few array operations per step.
+
+    Parameters:
+    - generator: The NumPy random number generator.
+    - adjacency: The closed (self-inclusive) boolean adjacency matrix of the board.
+    - n: The number of boards.
+    - N: The size of every connected area.
+
+    Returns:
+    - A boolean array of shape (n, number of nodes) marking the area of every board.
+    """
+    n_nodes = adjacency.shape[0]
+    if N > n_nodes:
+        raise ValueError(
+            "N cannot be greater than the total number of nodes in the graph."
+        )
+
+    boards = np.arange(n)
+    area = np.zeros((n, n_nodes), dtype=bool)
+    area[boards, generator.integers(0, n_nodes, size=n)] = True
+    adjacency = adjacency.astype(np.float32)
+    for _ in range(N - 1):
+        frontier = ((area.astype(np.float32) @ adjacency) > 0) & ~area
+        # Pick one frontier node per board uniformly by taking the largest random key
+        keys = np.where(frontier, generator.random((n, n_nodes)), -1.0)
+        area[boards, keys.argmax(axis=1)] = True
+    return area
+
+
 if __name__ == "__main__":
     # Example Usage
     G = nx.hexagonal_lattice_graph(5, 5)  # Create a 5x5 hexagonal grid graph
 
     # Mark a connected area of 10 nodes with 'is_Swamp' attribute
-    add_connected_area_attribute(G, "is_Swamp", 10)
+    add_connected_area_attribute(np.random.default_rng(), G, "is_Swamp", 10)
 
     # Print node attributes
     for node, data in G.nodes(data=True):
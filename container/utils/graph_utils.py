@@ -1,8 +1,9 @@
 import hashlib
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence
 
 import networkx as nx
+import numpy as np
 
 from utils.graph_generate_landscape import node_id_to_row_col, row_col_to_node_id
 
@@ -30,7 +31,7 @@ def serialize_graph(graph: nx.Graph, hints: Dict[str, List[str]] = None) -> str:
     }
 
     if hints:
-        hints_json = {f"player{i+1}": hints[i].tolist() for i in range(3)}
+        hints_json = {f"player{i+1}": [str(a) for a in hints[i]] for i in range(3)}
 
         graph_data["hints"] = hints_json
 
@@ -72,13 +73,13 @@ def parse_code_to_graph(graph_hash: str) -> nx.Graph:
             "'/opt/container/output/{graph_hash} file not found in /opt/container/output/"
         )
 
+    # Convert every node ID once; edges reuse the converted IDs
+    node_ids = {node: node_id_to_row_col(node) for node in graph_data["nodes"]}
     graph = nx.Graph()
     graph.add_nodes_from(
-        (node_id_to_row_col(node), attrs) for node, attrs in graph_data["nodes"].items()
-    )
-    graph.add_edges_from(
-        (node_id_to_row_col(u), node_id_to_row_col(v)) for u, v in graph_data["edges"]
+        (node_ids[node], attrs) for node, attrs in graph_data["nodes"].items()
     )
+    graph.add_edges_from((node_ids[u], node_ids[v]) for u, v in graph_data["edges"])
     # Check and correct player keys in hints
     if "hints" in graph_data and "player0" in graph_data["hints"]:
         corrected_hints = {}
@@ -122,27 +123,97 @@ def update_neighbors_with_prefix(
         nx.set_node_attributes(graph, updates)
 
 
-def enrich_node_attributes(graph: nx.Graph) -> nx.Graph:
+def closed_adjacency_matrix(
+    graph: nx.Graph, nodes: Optional[Sequence] = None
+) -> np.ndarray:
+    """
+    Build the adjacency matrix of the graph with every node also adjacent to itself.
+
+    Parameters:
+    - graph: A networkx graph (nx.Graph)
+    - nodes: The node order of the rows and columns (default is graph.nodes order)
+
+    Returns:
+    - A boolean (n, n) matrix, True where two nodes are equal or neighbors.
+    """
+    nodes = list(graph.nodes) if nodes is None else list(nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    adjacency = np.eye(len(nodes), dtype=bool)
+    for u, v in graph.edges():
+        adjacency[index[u], index[v]] = True
+        adjacency[index[v], index[u]] = True
+    return adjacency
+
+
+def neighbor_planes(
+    adjacency: np.ndarray, planes: np.ndarray, levels: int = 3
+) -> List[np.ndarray]:
+    """
+    Compute, for every attribute plane, which nodes have the attribute within 1..levels steps.
+
+    Parameters:
+    - adjacency: A closed (self-inclusive) boolean adjacency matrix of shape (n, n)
+    - planes: A boolean array of shape (..., n), one plane per attribute (and per board)
+    - levels: The number of levels to compute (default is 3)
+
+    Returns:
+    - A list of boolean arrays shaped like planes; entry k holds the within-(k + 1) planes.
+    """
+    adjacency = adjacency.astype(np.float32)
+    current = planes
+    result = []
+    for _ in range(levels):
+        # (... , n) @ (n, n): a node is reached when the attribute is on it or a neighbor
+        current = (current.astype(np.float32) @ adjacency) > 0
+        result.append(current)
+    return result
+
+
+def enrich_node_attributes(
+    graph: nx.Graph, adjacency: Optional[np.ndarray] = None
+) -> nx.Graph:
     """
     Enriches the graph by adding attributes to each node indicating whether
     the node or its neighbors (up to 3 levels) have a certain boolean attribute set to True.
 
+    All attributes and levels are computed at once with boolean matrix products, which gives
+    the same result as calling update_neighbors_with_prefix for every attribute.
+
     Parameters:
     - graph: A networkx graph (nx.Graph) with boolean attributes on nodes (one-hot encoded).
+    - adjacency: Optional precomputed closed adjacency matrix in graph.nodes order.
 
     Returns:
     - The enriched networkx graph with additional attributes.
     """
-    # Identify boolean attributes
-    boolean_attributes = set()
+    nodes = list(graph.nodes)
+    if adjacency is None:
+        adjacency = closed_adjacency_matrix(graph, nodes)
+
+    # Identify boolean attributes, in order of first appearance
+    boolean_attributes = {}
     for node, attrs in graph.nodes(data=True):
         boolean_attributes.update(
-            attr for attr, value in attrs.items() if isinstance(value, bool)
+            (attr, None) for attr, value in attrs.items() if isinstance(value, bool)
         )
+    boolean_attributes = list(boolean_attributes)
+
+    planes = np.array(
+        [
+            [graph.nodes[node].get(attr, False) is True for node in nodes]
+            for attr in boolean_attributes
+        ],
+        dtype=bool,
+    ).reshape(len(boolean_attributes), len(nodes))
 
     # Update attributes for all levels
-    for attr in boolean_attributes:
-        update_neighbors_with_prefix(graph, attr, "neighbor", levels=3)
+    levels = neighbor_planes(adjacency, planes, levels=3)
+    for level, level_planes in enumerate(levels, start=1):
+        prefix = "_".join(["neighbor"] * level)
+        names = [f"{prefix}_{attr}" for attr in boolean_attributes]
+        # transpose to (nodes, attributes) so each node gets one dict update
+        for node, values in zip(nodes, level_planes.T.tolist()):
+            graph.nodes[node].update(zip(names, values))
 
     return graph
 